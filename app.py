@@ -7,13 +7,32 @@ import json
 import base64
 import hmac
 import hashlib
-from backend.backend import generate_personalized_message, get_base_template # Import get_base_template here
+import logging
+import time
+from collections import deque
+from backend.backend import generate_personalized_message, get_base_template, resolve_engine # Import get_base_template here
+from backend.analytics import FunnelCounters
+from backend.delegates import DATE_FORMAT, DEFAULT_COLUMNS, STATUS_OPTIONS, DelegateStore, row_keys
+from backend.jobs import get_job, queue_stats, retry_job, submit_job
+from backend.mailer import DEFAULT_SUBJECT, EmailSender, is_valid_email
+from backend.profiling import PROFILE_CPROFILE, PROFILE_HISTORY, PROFILE_RERUNS, RerunProfiler
+from backend.search import SemanticIndex
+from backend.templating import render_template_message
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Configure logging (the backend only logs; the entry point decides how)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# --- Rerun Profiling --- (opt-in: PROFILE_RERUNS=1 or the sidebar toggle)
+profiler = RerunProfiler(
+    PROFILE_RERUNS or st.session_state.get("profile_reruns", False),
+    use_cprofile=PROFILE_CPROFILE or st.session_state.get("profile_cprofile", False),
+)
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="GDS-Lucknow MUN 2025",
@@ -23,7 +42,8 @@ st.set_page_config(
 )
 
 # --- Custom CSS --- (Centralized and Improved)
-st.markdown("""
+with profiler.section("CSS"):
+    st.markdown("""
 <style>
     /* General Styles */
     body {
@@ -201,10 +221,13 @@ CREDENTIALS = {
     os.getenv("USER_NAME", "delegateAffairsManager"): os.getenv("USER_PASSWORD", "GDSFTW")
 }
 CSV_PATH = "delegates.csv"
-DEFAULT_COLUMNS = ["Name", "Contact Info", "Response Status", "Follow-up Date"]
-STATUS_OPTIONS = ["Interested", "No Response", "Registered", "Rejected"]
 SECRET_KEY = os.getenv("SECRET_KEY", "GDS-LUCKNOW-MUN-2025-SECRET-KEY")
 COOKIE_NAME = "gds_auth"
+ENGINE_LABELS = {"Auto": "auto", "Template (instant)": "template", "AI Model": "llm"}
+EMAIL_ENABLED = bool(os.getenv("SMTP_HOST")) # Sending is off until an SMTP server is configured
+RESPONDED_STATUSES = {"Interested", "Registered", "Rejected"} # A send must not overwrite these
+# Run model calls in `python -m backend.worker` processes instead of this script thread
+USE_GENERATION_QUEUE = os.getenv("GENERATION_QUEUE", "1") == "1"
 
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -212,35 +235,121 @@ if 'current_page' not in st.session_state:
     st.session_state.current_page = "home"
 if 'username' not in st.session_state:
     st.session_state.username = None
+if 'delegate_editor_generation' not in st.session_state:
+    st.session_state.delegate_editor_generation = 0 # Bumped to start the delegate editor over
 
 # --- Helper Functions (Authentication, CSV, Filtering, etc.) ---
-def ensure_csv_exists():
+@st.cache_resource
+def get_delegate_store():
+    """One canonical delegate table per server process, shared by every session."""
     if not os.path.exists(CSV_PATH):
-        df = pd.DataFrame(columns=DEFAULT_COLUMNS)
-        df.to_csv(CSV_PATH, index=False)
-        return df
+        pd.DataFrame(columns=DEFAULT_COLUMNS).to_csv(CSV_PATH, index=False)
+    return DelegateStore(CSV_PATH, DEFAULT_COLUMNS)
+
+@st.cache_resource
+def get_funnel_counters():
+    """Outreach counters kept up to date from every change to the shared delegate store."""
+    counters = FunnelCounters()
+    counters.attach(get_delegate_store())
+    return counters
+
+@st.cache_resource
+def get_search_index():
+    """Delegate embeddings shared by every session; rows are embedded lazily on search."""
+    index = SemanticIndex()
+    index.attach(get_delegate_store())
+    return index
+
+@st.cache_resource
+def get_email_sender():
+    """One outbox sender per server process; resumes anything queued before a restart."""
+    store = get_delegate_store()
+
+    def mark_contacted(messages):
+        # Sent invites await a reply: set the follow-up date and, unless the
+        # delegate already responded, the status
+        frame, _ = store.snapshot()
+        statuses = dict(zip(frame["Name"], frame["Response Status"]))
+        follow_up = pd.Timestamp(datetime.now().date() + timedelta(days=3))
+        updates = {}
+        for message in messages:
+            if not message.delegate_name:
+                continue
+            values = {"Follow-up Date": follow_up}
+            if statuses.get(message.delegate_name) not in RESPONDED_STATUSES:
+                values["Response Status"] = "No Response"
+            if message.delegate_name not in statuses:
+                values["Contact Info"] = message.recipient
+            updates[message.delegate_name] = values
+        if updates:
+            store.update_rows(updates)
+
+    sender = EmailSender(on_sent=mark_contacted)
+    sender.start()
+    return sender
+
+def delegate_editor_key():
+    return f"delegate_editor_{st.session_state.delegate_editor_generation}"
+
+def reset_delegate_editor():
+    """Drops the editor's unsaved edits so it shows the latest table on the next rerun."""
+    st.session_state.delegate_editor_generation += 1
+
+def has_pending_delegate_edits():
+    """True while the delegate editor holds edits that haven't been saved."""
+    state = st.session_state.get(delegate_editor_key()) or {}
+    return any(state.get(part) for part in ("edited_rows", "added_rows", "deleted_rows"))
+
+def ensure_csv_exists():
+    # While the editor holds unsaved edits, keep the table they were made on: a
+    # new table would reset the editor, and saving against this base lets
+    # commit() merge in what other organizers saved meanwhile
+    if has_pending_delegate_edits() and 'delegates_base' in st.session_state:
+        return st.session_state.delegates_base
     try:
-        df = pd.read_csv(CSV_PATH)
-        # Convert 'Follow-up Date' strings to datetime for data_editor compatibility
-        if 'Follow-up Date' in df.columns:
-            df['Follow-up Date'] = pd.to_datetime(
-                df['Follow-up Date'],
-                format='%d %B %Y',
-                errors='coerce'
-            )
-        return df
-    except pd.errors.EmptyDataError:
-        # If CSV exists but is empty, return an empty DataFrame with correct columns
-        return pd.DataFrame(columns=DEFAULT_COLUMNS)
+        store = get_delegate_store()
+        base_df, version = store.snapshot()
+        # Pull only what other organizers changed since this session last looked
+        seen_version = st.session_state.get('delegates_version')
+        if seen_version is not None and seen_version < version:
+            changes = store.changes_since(seen_version)
+            if changes is not None:
+                changed_rows, deleted_names, _ = changes
+                updated = len(changed_rows) + len(deleted_names)
+                if updated:
+                    st.toast(f"{updated} delegate(s) updated by another organizer.", icon="🔄")
+        # Remember what this session loaded so save_to_csv can detect concurrent edits.
+        # This is a reference to the shared table, not a per-session copy.
+        st.session_state.delegates_base = base_df
+        st.session_state.delegates_version = version
+        # Already typed (dates are datetimes), so it goes straight to data_editor.
+        # It is shared: copy before modifying it in place.
+        return base_df
     except Exception as e:
         st.error(f"Error reading CSV: {e}")
         return pd.DataFrame(columns=DEFAULT_COLUMNS)
 
 def save_to_csv(df):
+    """Commits ``df`` to the shared store. Returns False (after showing the error) if it failed."""
     try:
-        df.to_csv(CSV_PATH, index=False)
+        # Saves against the version this session loaded; if another organizer saved
+        # in between, non-overlapping edits are merged and true conflicts reported
+        result = get_delegate_store().commit(
+            st.session_state.get('delegates_base', pd.DataFrame(columns=DEFAULT_COLUMNS)),
+            df,
+        )
+        st.session_state.delegates_base = result.frame
+        st.session_state.delegates_version = result.version
+        reset_delegate_editor() # The saved edits are in result.frame now
+        if result.conflicts:
+            # Kept in session state so they survive the st.rerun() that follows a save
+            st.session_state.delegate_conflicts = result.conflicts
+        elif result.merged:
+            st.toast("Merged with changes saved by another organizer.", icon="🔀")
+        return True
     except Exception as e:
         st.error(f"Error saving CSV: {e}")
+        return False
 
 def authenticate(username, password):
     return username in CREDENTIALS and CREDENTIALS[username] == password
@@ -300,6 +409,19 @@ def filter_dataframe(df, query):
         return df[mask]
     return df
 
+def semantic_filter(df, query):
+    """Returns the delegates closest in meaning to the query, best match first."""
+    if not query:
+        return df
+    try:
+        with st.spinner("Searching delegates..."):
+            matches = get_search_index().search(query)
+    except Exception as e:
+        st.warning(f"Semantic search is unavailable ({e}); showing text matches instead.")
+        return filter_dataframe(df, query)
+    positions = {key: i for i, key in enumerate(row_keys(df))}
+    return df.iloc[[positions[key] for key, _ in matches if key in positions]]
+
 def navigate_to(page):
     st.session_state.current_page = page
     st.rerun()
@@ -358,6 +480,12 @@ def show_home_page():
             if st.button("Go to Delegate Management", key="goto_delegates"):
                 navigate_to("delegate_management")
 
+    with st.container(border=True):
+        st.subheader("📊 Outreach Analytics")
+        st.write("See how the campaign is going: response funnel, daily status changes and overdue follow-ups.")
+        if st.button("Go to Analytics", key="goto_analytics"):
+            navigate_to("analytics")
+
     # Logout button at the bottom
     st.markdown("--- ")
     if st.button("Logout", key="logout_home", type="secondary"):
@@ -366,6 +494,43 @@ def show_home_page():
         st.session_state.username = None # Explicitly clear username
         st.rerun()
 
+@st.fragment(run_every=1)
+def show_generation_job():
+    # Polls the queued generation job; only this fragment reruns until it finishes
+    job = get_job(st.session_state.generation_job)
+    if job is None:
+        del st.session_state.generation_job
+        return
+    if job['status'] == 'done':
+        st.session_state.generated_message = job['result'] # Store for editing/copying
+        st.session_state.current_delegate_name = st.session_state.get('generation_job_delegate') # Store name for adding to list
+        del st.session_state.generation_job
+        st.toast("Email generated successfully!", icon="✨")
+        st.rerun() # Rerun the whole page to show the preview
+    elif job['status'] == 'failed':
+        st.error(f"Failed to generate email: {job['error']}")
+        col1, col2 = st.columns(2)
+        if col1.button("Retry", key="retry_generation_job", use_container_width=True):
+            retry_job(job['id'])
+        if col2.button("Dismiss", key="dismiss_generation_job", type="secondary", use_container_width=True):
+            del st.session_state.generation_job
+            st.rerun()
+    else:
+        waited = time.time() - job['created_at']
+        st.info(f"✨ Generating personalized email... ({job['status']}, {waited:.0f}s)")
+        if job['status'] == 'queued' and waited > 5 and queue_stats()['workers'] == 0:
+            st.warning("No generation worker is running. Start one with `python -m backend.worker`.")
+
+def generation_workers_running():
+    """True if a generation worker has sent a heartbeat recently; otherwise requests are generated inline."""
+    try:
+        if queue_stats()['workers'] > 0:
+            return True
+    except Exception as e:
+        logging.warning(f"Could not read the generation queue: {e}")
+    logging.info("No generation worker is running; generating inline.")
+    return False
+
 def show_email_generator():
     st.title("Cold Email Generator")
 
@@ -467,6 +632,13 @@ def show_email_generator():
                     value="Semi-formal",
                     key="tone_slider"
                 )
+                engine_choice = st.radio(
+                    "Generation Engine",
+                    list(ENGINE_LABELS),
+                    horizontal=True,
+                    help="Auto uses the instant template for simple details and an AI model when free-text notes need rephrasing.",
+                    key="engine_radio"
+                )
 
             submit_email = st.form_submit_button("Generate Personalized Email", use_container_width=True)
 
@@ -485,17 +657,29 @@ def show_email_generator():
                 if deadline_info: details["deadline"] = deadline_info.strftime("%B %d, %Y")
                 details["tone"] = tone_choice
 
-                with st.spinner("✨ Generating personalized email..."):
+                engine = resolve_engine(details, ENGINE_LABELS[engine_choice])
+                if USE_GENERATION_QUEUE and engine == "llm" and generation_workers_running():
+                    # Hand the model call to a worker; show_generation_job() polls for the result
                     try:
-                        personalized_message = generate_personalized_message(details)
-                        if personalized_message:
-                            st.success("Email generated successfully!")
-                            st.session_state.generated_message = personalized_message # Store for editing/copying
-                            st.session_state.current_delegate_name = delegate_name # Store name for adding to list
-                        else:
-                            st.error("Failed to generate email. Check backend logs or API keys.")
+                        st.session_state.generation_job = submit_job(details, engine)
+                        st.session_state.generation_job_delegate = delegate_name
                     except Exception as e:
                         st.error(f"An error occurred: {str(e)}")
+                else:
+                    with st.spinner("✨ Generating personalized email..."):
+                        try:
+                            personalized_message = generate_personalized_message(details, engine=engine)
+                            if personalized_message:
+                                st.success("Email generated successfully!")
+                                st.session_state.generated_message = personalized_message # Store for editing/copying
+                                st.session_state.current_delegate_name = delegate_name # Store name for adding to list
+                            else:
+                                st.error("Failed to generate email. Check backend logs or API keys.")
+                        except Exception as e:
+                            st.error(f"An error occurred: {str(e)}")
+
+        if st.session_state.get('generation_job'):
+            show_generation_job()
 
         # Display generated message outside the form if it exists in session state
         if 'generated_message' in st.session_state and st.session_state.generated_message:
@@ -532,7 +716,7 @@ def show_email_generator():
                         if st.session_state.current_delegate_name in df['Name'].values:
                             st.warning(f"Delegate '{st.session_state.current_delegate_name}' already exists in the list.")
                         else:
-                            follow_up = (datetime.now() + timedelta(days=3)).strftime("%d %B %Y")
+                            follow_up = pd.Timestamp(datetime.now().date() + timedelta(days=3))
                             new_row = pd.DataFrame({
                                 "Name": [st.session_state.current_delegate_name],
                                 "Contact Info": ["Add contact info"], # Default placeholder
@@ -540,8 +724,8 @@ def show_email_generator():
                                 "Follow-up Date": [follow_up]
                             })
                             df = pd.concat([df, new_row], ignore_index=True)
-                            save_to_csv(df)
-                            st.success(f"✅ Delegate '{st.session_state.current_delegate_name}' added to tracking list!")
+                            if save_to_csv(df):
+                                st.success(f"✅ Delegate '{st.session_state.current_delegate_name}' added to tracking list!")
                             # Optionally clear generated message after adding
                             # del st.session_state.generated_message
                             # del st.session_state.current_delegate_name
@@ -549,6 +733,26 @@ def show_email_generator():
                     else:
                         st.error("Delegate name not found to add to the list.")
 
+            # --- Send by Email ---
+            st.markdown("### Send by Email")
+            if not EMAIL_ENABLED:
+                st.info("Set SMTP_HOST (and credentials) in `.env` to send emails directly from here.")
+            else:
+                col1, col2 = st.columns(2)
+                with col1:
+                    recipient = st.text_input("Recipient Email", placeholder="delegate@example.com", key="send_recipient")
+                with col2:
+                    subject = st.text_input("Subject", value=DEFAULT_SUBJECT, key="send_subject")
+                if st.button("Queue Email", key="send_email_button", use_container_width=True):
+                    if not is_valid_email(recipient):
+                        st.warning("Please enter a valid recipient email address.")
+                    else:
+                        get_email_sender().enqueue(
+                            recipient, edited_message, subject,
+                            delegate_name=st.session_state.get('current_delegate_name'),
+                        )
+                        st.success(f"📨 Email to {recipient} queued. The delegate's follow-up date updates once it is sent.")
+
             # Tips Expander
             with st.expander("💡 Tips for Effective Delegate Outreach"):
                 st.markdown("""
@@ -559,13 +763,35 @@ def show_email_generator():
                 - **Clear Call to Action:** Make it obvious what you want them to do next (e.g., register, visit website).
                 """)
 
+@st.fragment(run_every=10)
+def show_delegate_updates():
+    # Cheap poll of the shared store's version; only this fragment reruns
+    if get_delegate_store().version > st.session_state.get('delegates_version', 0):
+        col1, col2 = st.columns([4, 1])
+        if has_pending_delegate_edits():
+            col1.info("Another organizer has updated the delegate list. Saving merges your edits into it; Refresh discards them.")
+        else:
+            col1.info("Another organizer has updated the delegate list.")
+        if col2.button("Refresh", key="refresh_delegates"):
+            reset_delegate_editor()
+            st.rerun()
+
 def show_delegate_management():
     st.title("Delegate Management")
 
     if st.button("← Back to Home", key="back_from_delegates", type="secondary"):
         navigate_to("home")
 
-    df = ensure_csv_exists()
+    with profiler.section("ensure_csv_exists"):
+        df = ensure_csv_exists()
+
+    # Edits from our last save that clashed with another organizer's save
+    conflicts = st.session_state.pop('delegate_conflicts', None)
+    if conflicts:
+        st.warning(
+            "Some of your changes conflicted with edits saved by another organizer and were not applied:\n\n"
+            + "\n".join(f"- {c}" for c in conflicts)
+        )
 
     # --- Add New Delegate Form ---
     with st.expander("➕ Add New Delegate"):
@@ -586,24 +812,29 @@ def show_delegate_management():
                 elif name in df['Name'].values:
                      st.warning(f"Delegate '{name}' already exists.")
                 else:
-                    formatted_date = follow_up_date.strftime("%d %B %Y")
                     new_row = pd.DataFrame({
                         "Name": [name],
                         "Contact Info": [contact_info],
                         "Response Status": [response_status],
-                        "Follow-up Date": [formatted_date]
+                        "Follow-up Date": [pd.Timestamp(follow_up_date)]
                     })
                     df = pd.concat([df, new_row], ignore_index=True)
-                    save_to_csv(df)
-                    st.success(f"Added delegate: {name}")
-                    st.rerun() # Rerun to update the list below
+                    if save_to_csv(df):
+                        st.success(f"Added delegate: {name}")
+                        st.rerun() # Rerun to update the list below
 
     st.markdown("--- ")
     st.subheader("Current Delegates")
+    show_delegate_updates()
 
     # --- Search & Filter ---
     search_query = st.text_input("Search Delegates", placeholder="Search by name, contact, status...", key="search_delegates")
-    filtered_df = filter_dataframe(df, search_query)
+    semantic_search = st.toggle("Semantic search", key="semantic_search", help="Find delegates by meaning rather than exact text, best matches first.")
+    with profiler.section("Search & filter"):
+        if semantic_search:
+            filtered_df = semantic_filter(df, search_query)
+        else:
+            filtered_df = filter_dataframe(df, search_query)
 
     st.write(f"Showing {len(filtered_df)} of {len(df)} delegates.")
 
@@ -626,14 +857,15 @@ def show_delegate_management():
         }
 
         # Use st.data_editor for a table-like editing experience
-        edited_df = st.data_editor(
-            filtered_df,
-            column_config=column_config,
-            num_rows="dynamic", # Allow adding/deleting rows
-            key="delegate_editor",
-            use_container_width=True,
-            hide_index=True, # Don't show pandas index
-        )
+        with profiler.section("Data editor"):
+            edited_df = st.data_editor(
+                filtered_df,
+                column_config=column_config,
+                num_rows="dynamic", # Allow adding/deleting rows
+                key=delegate_editor_key(),
+                use_container_width=True,
+                hide_index=True, # Don't show pandas index
+            )
 
         # --- Save Changes from Data Editor ---
         # Detect changes by comparing edited_df with the original filtered_df
@@ -647,17 +879,12 @@ def show_delegate_management():
                 # Update the original DataFrame (df) based on changes in edited_df
                 # This requires matching rows, e.g., by Name if it's unique, or by index
                 # For simplicity, let's update based on the index from filtered_df
-                # Convert Follow-up Date back to string format for saving
-                edited_df_copy = edited_df.copy()
-                if 'Follow-up Date' in edited_df_copy.columns:
-                     # Ensure the column exists and handle potential NaT values before formatting
-                    edited_df_copy['Follow-up Date'] = pd.to_datetime(edited_df_copy['Follow-up Date']).dt.strftime('%d %B %Y').fillna('')
-
-                # Update existing rows in the main df
-                df.update(edited_df_copy)
+                # Update existing rows in a copy of the shared df (types are restored on commit)
+                df = df.copy()
+                df.update(edited_df)
 
                 # Handle added rows (rows in edited_df not in filtered_df's original index)
-                new_rows = edited_df_copy[~edited_df_copy.index.isin(filtered_df.index)]
+                new_rows = edited_df[~edited_df.index.isin(filtered_df.index)]
                 if not new_rows.empty:
                     df = pd.concat([df, new_rows]).reset_index(drop=True)
 
@@ -666,19 +893,44 @@ def show_delegate_management():
                 if not deleted_indices.empty:
                     df = df.drop(index=deleted_indices).reset_index(drop=True)
 
-                save_to_csv(df)
-                st.success("Delegate list updated successfully!")
-                st.rerun()
+                if save_to_csv(df):
+                    st.success("Delegate list updated successfully!")
+                    st.rerun()
             except Exception as e:
                 st.error(f"Error saving changes: {e}")
 
     else:
         st.info("No delegates found matching your search criteria, or the list is empty.")
 
+    # --- Email Campaign ---
+    if EMAIL_ENABLED and not df.empty:
+        st.markdown("--- ")
+        with st.expander("📨 Email Campaign"):
+            st.write("Send the instant template invite to every delegate with an email address in Contact Info.")
+            with st.form("campaign_form"):
+                campaign_statuses = st.multiselect("Response Status", STATUS_OPTIONS, default=["No Response"], key="campaign_statuses")
+                campaign_tone = st.select_slider("Message Tone", options=["Formal", "Semi-formal", "Conversational"], value="Semi-formal", key="campaign_tone")
+                campaign_subject = st.text_input("Subject", value=DEFAULT_SUBJECT, key="campaign_subject")
+                submit_campaign = st.form_submit_button("Queue Campaign", use_container_width=True)
+            if submit_campaign:
+                targets = df[df['Response Status'].isin(campaign_statuses)]
+                batch = [
+                    (contact.strip(), render_template_message({"name": name, "tone": campaign_tone}), campaign_subject, name)
+                    for name, contact in zip(targets['Name'], targets['Contact Info'].fillna(''))
+                    if is_valid_email(str(contact))
+                ]
+                if batch:
+                    get_email_sender().enqueue_batch(batch)
+                    st.success(f"📨 Queued {len(batch)} email(s). Skipped {len(targets) - len(batch)} without a valid email address.")
+                else:
+                    st.warning("No matching delegates have an email address in Contact Info.")
+            stats = get_email_sender().stats()
+            st.caption(f"Outbox: {stats['queued']} queued · {stats['sent']} sent · {stats['failed']} failed · {stats['messages_per_second']:.1f} msg/s")
+
     # --- Export Functionality ---
     st.markdown("--- ")
     if not df.empty:
-        csv_data = df.to_csv(index=False).encode('utf-8')
+        csv_data = df.to_csv(index=False, date_format=DATE_FORMAT).encode('utf-8')
         st.download_button(
             label="📥 Export Delegates as CSV",
             data=csv_data,
@@ -688,30 +940,113 @@ def show_delegate_management():
             use_container_width=True
         )
 
+def show_analytics():
+    st.title("Outreach Analytics")
+
+    if st.button("← Back to Home", key="back_from_analytics", type="secondary"):
+        navigate_to("home")
+
+    # Everything here comes from materialized counters, so it costs the same for 10 or 100k delegates
+    stats = get_funnel_counters().snapshot(days=14)
+
+    st.subheader("Response Funnel")
+    cols = st.columns(len(STATUS_OPTIONS) + 1)
+    cols[0].metric("Total Delegates", stats["total"])
+    for col, status in zip(cols[1:], STATUS_OPTIONS):
+        col.metric(status, stats["status_counts"].get(status, 0))
+
+    st.metric("Overdue Follow-ups", stats["overdue"], help="Interested or No Response delegates whose follow-up date has passed.")
+
+    st.subheader("Status Changes (Last 14 Days)")
+    transitions = pd.DataFrame.from_dict(stats["transitions"], orient="index").fillna(0)
+    if transitions.empty or not transitions.to_numpy().any():
+        st.info("No status changes recorded in the last 14 days.")
+    else:
+        st.bar_chart(transitions)
+        week = transitions.tail(7).sum()
+        this_week = {status: int(week.filter(like=f"→ {status}").sum()) for status in ("Interested", "Registered")}
+        st.write(f"This week: **{this_week['Interested']}** became Interested, **{this_week['Registered']}** Registered.")
+
 # --- Main App Logic ---
 def main():
     Path("backend").mkdir(exist_ok=True)
 
     if not st.session_state.authenticated:
         # Try to authenticate using saved credentials before showing login
-        if not check_saved_credentials():
-            show_login_page()
+        with profiler.section("Auth token check"):
+            saved_login = check_saved_credentials()
+        if not saved_login:
+            with profiler.section("show_login_page"):
+                show_login_page()
         else:
             # If check_saved_credentials was successful, it sets authenticated state
             # We need to rerun to reflect the logged-in state
             st.rerun()
     else:
+        with profiler.section("Shared resources"):
+            get_funnel_counters() # Subscribe before anything edits the list so no change goes uncounted
+            if EMAIL_ENABLED:
+                get_email_sender() # Starts the sender so queued emails go out after a restart
         # User is authenticated, show the requested page
-        page = st.session_state.current_page
-        if page == "home":
-            show_home_page()
-        elif page == "email_generator":
-            show_email_generator()
-        elif page == "delegate_management":
-            show_delegate_management()
-        else:
-            # Default to home page if current_page is invalid
-            show_home_page()
+        pages = {
+            "home": show_home_page,
+            "email_generator": show_email_generator,
+            "delegate_management": show_delegate_management,
+            "analytics": show_analytics,
+        }
+        # Default to home page if current_page is invalid
+        page_function = pages.get(st.session_state.current_page, show_home_page)
+        with profiler.section(page_function.__name__):
+            page_function()
+
+def record_rerun(report):
+    """Adds a finished rerun to this session's duration history."""
+    if report is None:
+        return
+    history = st.session_state.setdefault('rerun_history', deque(maxlen=PROFILE_HISTORY))
+    history.append({"Rerun": datetime.fromtimestamp(report.started_at), "ms": report.total * 1000})
+
+def show_rerun_profile(report):
+    """Sidebar panel with the profiling toggles, this rerun's breakdown and recent rerun times."""
+    if not (st.session_state.authenticated or PROFILE_RERUNS):
+        return
+    with st.sidebar:
+        st.subheader("⏱️ Rerun Profiling")
+        if not PROFILE_RERUNS:
+            st.toggle("Profile reruns", key="profile_reruns", help="Time each part of every rerun of this page.")
+        if report is None:
+            return
+        if not PROFILE_CPROFILE:
+            st.toggle("Capture cProfile", key="profile_cprofile", help="Slows reruns down; applies from the next one.")
+
+        history = st.session_state.setdefault('rerun_history', deque(maxlen=PROFILE_HISTORY))
+
+        st.metric("Last rerun", f"{report.total * 1000:.0f} ms")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Section": "\u2003" * section.depth + section.name, # Indent nested sections
+                    "ms": round(section.seconds * 1000, 1),
+                    "% of rerun": round(100 * section.seconds / report.total, 1),
+                }
+                for section in report.sections
+            ]),
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.caption(f"Last {len(history)} reruns (ms)")
+        st.line_chart(pd.DataFrame(list(history)).set_index("Rerun"), height=160)
+        if report.profile:
+            with st.expander("cProfile (cumulative)"):
+                st.code(report.profile, language=None)
+        elif profiler.note:
+            st.caption(profiler.note)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # st.rerun() and st.stop() raise out of main(); cProfile must still stop and the rerun still counts
+        report = profiler.finish()
+        record_rerun(report)
+    show_rerun_profile(report)
\ No newline at end of file
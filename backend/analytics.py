@@ -0,0 +1,170 @@
+"""Materialized outreach funnel counters, updated incrementally from store changes.
+
+``FunnelCounters`` subscribes to the ``DelegateStore`` and adjusts its counts
+for just the rows each change touched, so the dashboard reads a handful of
+numbers instead of scanning the delegate list. Status counts and follow-up
+buckets are rebuilt from the table once at startup; the per-day transition
+history cannot be, so it is persisted to ``ANALYTICS_PATH``.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+import pandas as pd
+
+from backend.delegates import DATE_COLUMN, STATUS_COLUMN, DelegateStore, StoreChange
+
+ANALYTICS_PATH = os.getenv("ANALYTICS_PATH", "analytics.json")
+# Delegates in these statuses still need a follow-up; the rest are settled
+OPEN_STATUSES = {"No Response", "Interested"}
+HISTORY_DAYS = 90  # Days of transition history kept on disk
+HISTORY_SAVE_DELAY = 2.0  # Seconds of changes batched into one rewrite of the history file
+NEW_LABEL = "New"  # "From" side of the transition recorded when a delegate is added
+
+
+def _due_date(value) -> date | None:
+    # Store changes carry plain dates; a full table read gives pd.Timestamp or NaT
+    if pd.isna(value):
+        return None
+    return value.date() if isinstance(value, datetime) else value
+
+
+class FunnelCounters:
+    """Status counts, status transitions per day and overdue follow-ups."""
+
+    def __init__(self, path: str = ANALYTICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.status_counts = Counter()
+        self._follow_ups = Counter()  # follow-up date -> open delegates due that day
+        self._overdue = 0  # Open delegates with a follow-up date before _overdue_as_of
+        self._overdue_as_of = date.today()
+        self.transitions: Dict[str, Counter] = {}  # ISO day -> Counter("A → B")
+        self._save_lock = threading.Lock()  # Serializes history file writes; taken before _lock
+        self._save_timer = None  # Pending batched save, if any
+        self._load_history()
+
+    # --- Wiring ---
+
+    def attach(self, store: DelegateStore) -> None:
+        """Builds the counters from the store's table and follows its changes from then on."""
+        store.subscribe(self.apply_change, initial=self.rebuild)
+
+    def rebuild(self, frame: pd.DataFrame) -> None:
+        """Recounts statuses and follow-ups from a full table."""
+        with self._lock:
+            self.status_counts.clear()
+            self._follow_ups.clear()
+            self._overdue, self._overdue_as_of = 0, date.today()
+            statuses = frame[STATUS_COLUMN].tolist() if STATUS_COLUMN in frame else []
+            dates = frame[DATE_COLUMN].tolist() if DATE_COLUMN in frame else [None] * len(statuses)
+            for status, follow_up in zip(statuses, dates):
+                self._add_row_locked(status, follow_up, +1)
+
+    def apply_change(self, change: StoreChange) -> None:
+        """Adjusts the counters for the rows in one store change."""
+        today = date.today().isoformat()
+        transitioned = False
+        with self._lock:
+            for key, new in change.after.items():
+                old = change.before.get(key)
+                old_status = (old.get(STATUS_COLUMN) or "") if old else None
+                new_status = (new.get(STATUS_COLUMN) or "") if new else None
+                if old:
+                    self._add_row_locked(old_status, old.get(DATE_COLUMN), -1)
+                if new:
+                    self._add_row_locked(new_status, new.get(DATE_COLUMN), +1)
+                    if new_status != old_status:
+                        label = f"{old_status or NEW_LABEL} → {new_status or 'Unset'}"
+                        self.transitions.setdefault(today, Counter())[label] += 1
+                        transitioned = True
+            if transitioned and self._save_timer is None:
+                # Non-daemon, so a pending save still lands when the process exits
+                self._save_timer = threading.Timer(HISTORY_SAVE_DELAY, self._save_history)
+                self._save_timer.start()
+
+    # --- Reads (constant time with respect to the delegate list) ---
+
+    def overdue_follow_ups(self) -> int:
+        """Open delegates whose follow-up date has passed."""
+        with self._lock:
+            self._advance_overdue_locked()
+            return self._overdue
+
+    def snapshot(self, days: int = 14) -> Dict[str, Any]:
+        """Returns everything the dashboard shows: counts, overdue and recent transitions."""
+        with self._lock:
+            self._advance_overdue_locked()
+            first_day = date.today() - timedelta(days=days - 1)
+            recent = {
+                (first_day + timedelta(days=i)).isoformat(): dict(self.transitions.get((first_day + timedelta(days=i)).isoformat(), {}))
+                for i in range(days)
+            }
+            return {
+                "status_counts": dict(self.status_counts),
+                "total": sum(self.status_counts.values()),
+                "overdue": self._overdue,
+                "transitions": recent,
+            }
+
+    # --- Internals ---
+
+    def _add_row_locked(self, status: str, follow_up, sign: int) -> None:
+        if not isinstance(status, str):  # An unset categorical status reads as NaN
+            status = ""
+        self.status_counts[status] += sign
+        if not self.status_counts[status]:
+            del self.status_counts[status]
+        if status not in OPEN_STATUSES:
+            return
+        due = _due_date(follow_up)
+        if due is None:
+            return
+        self._follow_ups[due] += sign
+        if due < self._overdue_as_of:
+            self._overdue += sign
+
+    def _advance_overdue_locked(self) -> None:
+        # Each day that passes moves that day's follow-ups into the overdue total,
+        # so the cost is one bucket per elapsed day, not a scan of the list
+        today = date.today()
+        while self._overdue_as_of < today:
+            self._overdue += self._follow_ups.get(self._overdue_as_of, 0)
+            self._overdue_as_of += timedelta(days=1)
+
+    def _load_history(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.transitions = {day: Counter(counts) for day, counts in data.get("transitions", {}).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Could not read analytics history from {self.path}: {e}")
+
+    def _save_history(self) -> None:
+        cutoff = (date.today() - timedelta(days=HISTORY_DAYS)).isoformat()
+        # Snapshot and write under one lock, so an older snapshot can't land last
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None  # Changes from here on schedule the next save
+                for day in [d for d in self.transitions if d < cutoff]:
+                    del self.transitions[day]
+                data = {"transitions": {day: dict(counts) for day, counts in self.transitions.items()}}
+            try:
+                # A unique temp name, so another process saving the same file can't interleave with us
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(data, f)
+                    os.replace(tmp_path, self.path)
+                except Exception:
+                    os.remove(tmp_path)
+                    raise
+            except Exception as e:
+                logging.warning(f"Could not save analytics history to {self.path}: {e}")
@@ -0,0 +1,76 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+While a call for a key is running, further calls with the same key wait for
+it and share its result (or its exception) instead of starting their own.
+This works across threads, and so across the Streamlit sessions of one
+server process.
+"""
+import json
+import threading
+from typing import Any, Callable, Dict
+
+
+def normalize_details(details: Dict[str, Any]) -> Dict[str, Any]:
+    """Drops empty fields and surrounding whitespace, so equivalent requests compare equal."""
+    normalized = {}
+    for field, value in details.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        normalized[field] = value
+    return normalized
+
+
+def request_key(*parts: Any) -> str:
+    """Builds a stable key from JSON-serializable parts (dicts are key-sorted)."""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._total = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Returns ``fn()``, or the result of the identical call already in flight."""
+        with self._lock:
+            self._total += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a fresh call; results are not cached
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns total calls, calls that joined one in flight, and calls in flight now."""
+        with self._lock:
+            return {"calls": self._total, "coalesced": self._coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,505 @@
+"""Versioned, multi-session safe storage for the delegate list CSV.
+
+Every save bumps a version stamp kept next to the CSV (``delegates.csv.version``)
+while holding a lock file. A session saves against the version it loaded: if
+nobody else saved in between, its table is written as-is, otherwise its edits
+are three-way merged (keyed by delegate Name) into what is on disk and only
+cells both sides changed differently are reported as conflicts.
+
+Within one server process, ``DelegateStore`` holds the single canonical table
+that every session reads, with an in-memory version and a change feed. The
+table is converted to the typed schema in ``DELEGATE_DTYPES`` once, when it is
+read from disk; dates are only formatted back to text when the CSV is written.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMN = "Name"
+STATUS_COLUMN = "Response Status"
+DATE_COLUMN = "Follow-up Date"
+DATE_FORMAT = "%d %B %Y"  # How follow-up dates are written in the CSV
+DEFAULT_COLUMNS = [KEY_COLUMN, "Contact Info", STATUS_COLUMN, DATE_COLUMN]
+STATUS_OPTIONS = ["Interested", "No Response", "Registered", "Rejected"]
+
+try:
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:  # Without pyarrow, pandas' own string array
+    STRING_DTYPE = pd.StringDtype()
+
+# Text lives in contiguous Arrow buffers, statuses are one-byte codes into
+# STATUS_OPTIONS and dates are native datetimes, instead of a Python object per
+# cell. Columns not listed here are kept as strings.
+DELEGATE_DTYPES = {
+    KEY_COLUMN: STRING_DTYPE,
+    "Contact Info": STRING_DTYPE,
+    STATUS_COLUMN: pd.CategoricalDtype(STATUS_OPTIONS),
+    DATE_COLUMN: "datetime64[ns]",
+}
+
+LOCK_TIMEOUT = 10.0  # Seconds to wait for another session's save to finish
+STALE_LOCK_AGE = 30.0  # A lock older than this was left behind by a crashed process
+CHANGELOG_SIZE = 1000  # Store versions a lagging session can still catch up on incrementally
+
+
+class SaveResult(NamedTuple):
+    frame: pd.DataFrame  # What is now on disk, typed
+    version: int
+    merged: bool  # True if another session saved first and edits were merged
+    conflicts: List[str]
+
+
+class StoreChange(NamedTuple):
+    version: int
+    before: Dict[str, Dict[str, Any] | None]  # Row key -> row before the change (None if added)
+    after: Dict[str, Dict[str, Any] | None]  # Row key -> row after the change (None if deleted)
+
+
+class LockTimeout(Exception):
+    """Raised when the delegate list stays locked for longer than LOCK_TIMEOUT."""
+
+
+def _version_path(csv_path: str) -> str:
+    return f"{csv_path}.version"
+
+
+@contextmanager
+def file_lock(csv_path: str, timeout: float = LOCK_TIMEOUT):
+    """Holds an exclusive lock file for ``csv_path`` across processes and threads.
+
+    The lock file holds a token unique to this holder, so release never
+    removes a lock that has since been broken and taken by someone else.
+    """
+    lock_path = f"{csv_path}.lock"
+    token = f"{os.getpid()}:{uuid.uuid4().hex}"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_AGE:
+                    _break_stale_lock(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue  # Released between our checks; just retry
+            if time.monotonic() > deadline:
+                raise LockTimeout(f"Timed out waiting for {lock_path}")
+            time.sleep(0.005)
+    try:
+        os.write(fd, token.encode())
+    except BaseException:
+        os.close(fd)
+        os.remove(lock_path)
+        raise
+    os.close(fd)
+    try:
+        yield
+    finally:
+        try:
+            with open(lock_path) as f:
+                ours = f.read() == token
+        except FileNotFoundError:
+            ours = False
+        if ours:
+            os.remove(lock_path)
+        else:
+            logging.warning(f"Lock file {lock_path} was broken as stale while held")
+
+
+def _break_stale_lock(lock_path: str) -> None:
+    # Renaming is atomic, so of several processes breaking the same lock only
+    # one succeeds; the rest get FileNotFoundError and retry
+    stale_path = f"{lock_path}.{uuid.uuid4().hex}.stale"
+    os.rename(lock_path, stale_path)
+    try:
+        if time.time() - os.path.getmtime(stale_path) > STALE_LOCK_AGE:
+            logging.warning(f"Removed stale lock file {lock_path}")
+            return
+        # Another process broke the stale lock and took a fresh one between our
+        # age check and the rename; hand it back unless someone has locked since
+        try:
+            os.link(stale_path, lock_path)
+        except FileExistsError:
+            logging.warning(f"Could not restore lock file {lock_path} after breaking it by mistake")
+    finally:
+        os.remove(stale_path)
+
+
+def read_version(csv_path: str) -> int:
+    """Returns the current version stamp of ``csv_path`` (0 if never saved through here)."""
+    try:
+        with open(_version_path(csv_path)) as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _format_date(value) -> str:
+    if pd.isna(value):
+        return ""
+    if isinstance(value, date):  # Also covers datetime and pd.Timestamp
+        return value.strftime(DATE_FORMAT)
+    return str(value)
+
+
+_reported_statuses = set()
+
+
+def _to_statuses(values: pd.Series) -> pd.Series:
+    dtype = DELEGATE_DTYPES[STATUS_COLUMN]
+    if values.dtype == dtype:
+        return values
+    unknown = set(values.dropna()) - set(STATUS_OPTIONS) - {""}
+    if unknown:
+        # Keep statuses from older lists or hand edits rather than blanking them
+        if unknown - _reported_statuses:
+            logging.warning(f"Unknown Response Status value(s) in the delegate list: {sorted(unknown - _reported_statuses)}")
+            _reported_statuses.update(unknown)
+        dtype = pd.CategoricalDtype(STATUS_OPTIONS + sorted(unknown))
+    return values.where(values != "").astype(dtype)
+
+
+def to_typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts a table to the delegate schema (see DELEGATE_DTYPES), so edits compare reliably.
+
+    Accepts the strings read from the CSV as well as editor output, where
+    dates may be datetimes, dates or formatted strings. Missing text becomes
+    "", a missing status or date becomes NaN/NaT.
+    """
+    df = df.reset_index(drop=True)
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col == DATE_COLUMN:
+            if values.dtype != DELEGATE_DTYPES[DATE_COLUMN]:
+                # Rows can mix datetimes from the editor with strings from the CSV
+                values = pd.to_datetime(values, format=DATE_FORMAT, errors="coerce").astype(DELEGATE_DTYPES[DATE_COLUMN])
+        elif col == STATUS_COLUMN:
+            values = _to_statuses(values)
+        else:
+            values = values.astype(DELEGATE_DTYPES.get(col, STRING_DTYPE)).fillna("")
+        columns[col] = values
+    return pd.DataFrame(columns, columns=df.columns)
+
+
+def _read_csv(csv_path: str, columns: List[str]) -> pd.DataFrame:
+    try:
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        df = pd.DataFrame(columns=columns)
+    return to_typed_frame(df)
+
+
+def _csv_dates(values: pd.Series) -> np.ndarray:
+    # Follow-up dates repeat a lot; format each distinct date once rather than
+    # every row (to_csv's date_format is several times slower)
+    codes, uniques = pd.factorize(values)
+    labels = np.append(uniques.strftime(DATE_FORMAT).to_numpy(dtype=object), "")
+    return labels[codes]  # Code -1 (NaT) picks the trailing ""
+
+
+def _write_csv(csv_path: str, df: pd.DataFrame, version: int) -> None:
+    if DATE_COLUMN in df.columns:
+        df = df.assign(**{DATE_COLUMN: _csv_dates(df[DATE_COLUMN])})
+    _replace_file(csv_path, lambda f: df.to_csv(f, index=False))
+    _replace_file(_version_path(csv_path), lambda f: f.write(str(version)))
+
+
+def _replace_file(path: str, write: Callable[[Any], Any]) -> None:
+    # Write to a temp file and rename so readers never see a half-written
+    # file (an empty .version would read as version 0)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def read_delegates(csv_path: str, columns: List[str]) -> Tuple[pd.DataFrame, int]:
+    """Reads the typed delegate list together with its version stamp."""
+    # Writes are atomic renames, so reading without the lock is safe as long as
+    # the version did not move while we read; otherwise read again.
+    for _ in range(5):
+        version = read_version(csv_path)
+        df = _read_csv(csv_path, columns)
+        if read_version(csv_path) == version:
+            return df, version
+    with file_lock(csv_path):
+        return _read_csv(csv_path, columns), read_version(csv_path)
+
+
+def _column_values(values: pd.Series) -> list:
+    if values.dtype == DELEGATE_DTYPES[DATE_COLUMN]:
+        # Plain dates (None for NaT) are far cheaper to build than pd.Timestamps
+        return values.to_numpy().astype("datetime64[D]").tolist()
+    # NaN and NA never compare equal to themselves, so missing cells become None
+    if values.hasnans:
+        return values.astype(object).where(values.notna(), None).tolist()
+    return values.tolist()
+
+
+def row_keys(df: pd.DataFrame) -> List[str]:
+    """Returns each row's key: its Name, with a "#n" suffix for the n-th repeat of a name."""
+    keys, seen = [], {}
+    names = df[KEY_COLUMN].tolist() if KEY_COLUMN in df.columns else [""] * len(df)
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        keys.append(name if seen[name] == 1 else f"{name}#{seen[name]}")
+    return keys
+
+
+def _keyed_rows(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Maps each row's key (see row_keys) to its values."""
+    columns = list(df.columns)
+    # Column-wise tolist() + zip is several times faster than to_dict("records")
+    records = zip(*(_column_values(df[col]) for col in columns))
+    return {key: dict(zip(columns, values)) for key, values in zip(row_keys(df), records)}
+
+
+def merge_delegates(base: pd.DataFrame, ours: pd.DataFrame, theirs: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """Three-way merges two edited copies of ``base``. All frames must be typed.
+
+    Rows and cells changed on only one side take that side's value. When both
+    sides changed the same cell (or one edited a row the other deleted) the
+    saved value in ``theirs`` is kept and the clash is reported.
+
+    Returns:
+        The merged table and a list of human-readable conflict descriptions.
+    """
+    base_rows, our_rows, their_rows = _keyed_rows(base), _keyed_rows(ours), _keyed_rows(theirs)
+    columns = list(dict.fromkeys([*theirs.columns, *ours.columns]))
+    conflicts = []
+    merged = []
+
+    # Keep the saved order, then append rows only we added
+    for key in [*their_rows, *(k for k in our_rows if k not in their_rows)]:
+        b, o, t = base_rows.get(key), our_rows.get(key), their_rows.get(key)
+        if o == b:
+            row = t
+        elif t == b or o == t:
+            row = o
+        elif o is None:
+            conflicts.append(f"{key}: deleted here but edited by another organizer (kept their version)")
+            row = t
+        elif t is None:
+            if b is None:
+                row = o
+            else:
+                conflicts.append(f"{key}: edited here but deleted by another organizer (kept deleted)")
+                row = None
+        else:
+            row = {}
+            b = b or {}
+            for col in columns:
+                bv, ov, tv = b.get(col, ""), o.get(col, ""), t.get(col, "")
+                if ov == bv or ov == tv:
+                    row[col] = tv
+                elif tv == bv:
+                    row[col] = ov
+                else:
+                    tv_text, ov_text = _format_date(tv), _format_date(ov)
+                    conflicts.append(f"{key}: '{col}' is '{tv_text}' (another organizer) vs '{ov_text}' (yours); kept '{tv_text}'")
+                    row[col] = tv
+        if row is not None:
+            merged.append(row)
+
+    return to_typed_frame(pd.DataFrame(merged, columns=columns)), conflicts
+
+
+def save_delegates(csv_path: str, base: pd.DataFrame, ours: pd.DataFrame, base_version: int) -> SaveResult:
+    """Saves ``ours`` if the list is still at ``base_version``, otherwise merges it first.
+
+    Args:
+        csv_path: The delegate list CSV.
+        base: The typed table as loaded at ``base_version``.
+        ours: The session's edited table.
+        base_version: The version stamp read together with ``base``.
+
+    Returns:
+        A SaveResult with the table now on disk, its new version and any conflicts.
+    """
+    ours = to_typed_frame(ours)
+    with file_lock(csv_path):
+        current_version = read_version(csv_path)
+        if current_version == base_version:
+            frame, conflicts, merged = ours, [], False
+        else:
+            theirs = _read_csv(csv_path, list(ours.columns))
+            frame, conflicts = merge_delegates(base, ours, theirs)
+            merged = True
+            logging.info(f"Delegate list moved from v{base_version} to v{current_version}; merged with {len(conflicts)} conflict(s).")
+        new_version = current_version + 1
+        _write_csv(csv_path, frame, new_version)
+    return SaveResult(frame, new_version, merged, conflicts)
+
+
+class DelegateStore:
+    """The canonical delegate table shared by every session of one server process.
+
+    Sessions read the same immutable DataFrame instead of each keeping a copy;
+    every change swaps in a new frame and bumps a monotonically increasing
+    version. Sessions remember the version they last saw and pull only the rows
+    changed since then; in-process consumers can subscribe to changes instead.
+    Saves from other processes are picked up by watching the file's version stamp.
+    """
+
+    def __init__(self, csv_path: str, columns: List[str]):
+        self.csv_path = csv_path
+        self.columns = columns
+        self._lock = threading.RLock()
+        self._frame, self._file_version = read_delegates(csv_path, columns)
+        self._rows = _keyed_rows(self._frame)
+        self._version = 0
+        # (version, keys changed in it, keys deleted in it), oldest first
+        self._changelog = deque(maxlen=CHANGELOG_SIZE)
+        self._subscribers: List[Callable[[StoreChange], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def snapshot(self) -> Tuple[pd.DataFrame, int]:
+        """Returns the shared typed table (do not mutate) and its version."""
+        change = None
+        with self._lock:
+            if read_version(self.csv_path) != self._file_version:
+                # Another process saved; adopt its table as a change of our own
+                frame, file_version = read_delegates(self.csv_path, self.columns)
+                change = self._apply_locked(frame, file_version)
+            frame, version = self._frame, self._version
+            subscribers = list(self._subscribers)
+        self._notify(change, subscribers)
+        return frame, version
+
+    def changes_since(self, version: int) -> Tuple[pd.DataFrame, List[str], int] | None:
+        """Returns rows changed and keys deleted after ``version``, plus the current version.
+
+        Returns None when ``version`` is older than the retained change log, in
+        which case the caller should fall back to ``snapshot()``.
+        """
+        with self._lock:
+            if version < self._version and (not self._changelog or self._changelog[0][0] > version + 1):
+                return None
+            changed, deleted = set(), set()
+            for entry_version, changed_keys, deleted_keys in self._changelog:
+                if entry_version > version:
+                    changed = (changed - deleted_keys) | changed_keys
+                    deleted = (deleted - changed_keys) | deleted_keys
+            rows = [self._rows[key] for key in changed if key in self._rows]
+            return to_typed_frame(pd.DataFrame(rows, columns=self._frame.columns)), sorted(deleted), self._version
+
+    def subscribe(self, callback: Callable[[StoreChange], None],
+                  initial: Callable[[pd.DataFrame], None] | None = None) -> Callable[[], None]:
+        """Calls ``callback`` after every change. Returns a function that unsubscribes.
+
+        ``initial``, if given, is called with the current table under the same
+        lock, so a subscriber that builds state from it neither misses nor
+        double counts a change.
+        """
+        with self._lock:
+            if initial is not None:
+                initial(self._frame)
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def commit(self, base: pd.DataFrame, edited: pd.DataFrame) -> SaveResult:
+        """Saves a session's edited table, merging it if the store moved past ``base``.
+
+        Args:
+            base: The frame the session got from ``snapshot()`` before editing.
+            edited: The session's edited table.
+
+        Returns:
+            A SaveResult whose version is the store version after the save.
+        """
+        ours = to_typed_frame(edited)
+        with self._lock:
+            current = self._frame
+            if base is current:
+                frame, conflicts = ours, []
+            else:
+                frame, conflicts = merge_delegates(base, ours, current)
+            # save_delegates also merges in anything another process wrote meanwhile
+            result = save_delegates(self.csv_path, current, frame, self._file_version)
+            change = self._apply_locked(result.frame, result.version)
+            saved = SaveResult(self._frame, self._version, base is not current or result.merged, conflicts + result.conflicts)
+            subscribers = list(self._subscribers)
+        self._notify(change, subscribers)
+        return saved
+
+    def update_rows(self, updates: Dict[str, Dict[str, Any]], add_missing: bool = True) -> SaveResult:
+        """Sets column values for several delegates (by Name) in a single commit.
+
+        Args:
+            updates: Name -> {column: value}, with dates as datetimes.
+            add_missing: Append delegates that are not in the list yet.
+        """
+        with self._lock:
+            base = self._frame
+            edited = base.copy()
+            positions = {}
+            for i, name in enumerate(base[KEY_COLUMN].tolist()):
+                positions.setdefault(name, i)
+            new_rows = []
+            for name, values in updates.items():
+                if name in positions:
+                    for col, value in values.items():
+                        edited.iat[positions[name], edited.columns.get_loc(col)] = value
+                elif add_missing:
+                    new_rows.append({col: "" for col in base.columns} | values | {KEY_COLUMN: name})
+            if new_rows:
+                edited = pd.concat([edited, pd.DataFrame(new_rows, columns=base.columns)], ignore_index=True)
+            return self.commit(base, edited)
+
+    def _apply_locked(self, frame: pd.DataFrame, file_version: int) -> StoreChange | None:
+        """Swaps in ``frame`` and records which rows changed. Caller holds the lock."""
+        self._file_version = file_version
+        new_rows = _keyed_rows(frame)
+        before, after = {}, {}
+        for key, row in new_rows.items():
+            if self._rows.get(key) != row:
+                before[key], after[key] = self._rows.get(key), row
+        for key, row in self._rows.items():
+            if key not in new_rows:
+                before[key], after[key] = row, None
+        self._frame, self._rows = frame, new_rows
+        if not after:
+            return None
+        self._version += 1
+        self._changelog.append((
+            self._version,
+            {key for key, row in after.items() if row is not None},
+            {key for key, row in after.items() if row is None},
+        ))
+        return StoreChange(self._version, before, after)
+
+    def _notify(self, change: StoreChange | None, subscribers: List[Callable[[StoreChange], None]]) -> None:
+        # ``subscribers`` is captured under the lock together with the change,
+        # so someone subscribing meanwhile never sees a change twice
+        if change is None:
+            return
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                logging.error(f"Delegate store subscriber failed: {e}")
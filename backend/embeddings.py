@@ -0,0 +1,113 @@
+"""Text embedding models for semantic delegate search.
+
+``OllamaEmbedder`` calls the Ollama embeddings endpoint; ``HashingEmbedder`` is
+a dependency-free local stand-in (hashed words and character trigrams) for
+tests and machines without Ollama. ``EMBEDDER`` picks one: "ollama",
+"hashing", or "auto" to use Ollama when it serves ``OLLAMA_EMBED_MODEL``.
+"""
+import logging
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+EMBEDDER = os.getenv("EMBEDDER", "auto")
+OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+EMBED_BATCH_SIZE = 64  # Texts per embeddings request
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scales each row to unit length, so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class Embedder:
+    """Base class for embedding models. Subclasses set ``model_id`` and override ``_embed``."""
+
+    model_id = "base"  # Identifies the vector space; cached vectors from another model are discarded
+
+    def is_available(self) -> bool:
+        return True
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns one unit-length float32 row per text."""
+        batches = [self._embed(texts[i:i + EMBED_BATCH_SIZE]) for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize_rows(np.vstack(batches).astype(np.float32))
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class OllamaEmbedder(Embedder):
+    """Embeddings from the /api/embed endpoint of the Ollama hosts in rotation."""
+
+    def __init__(self, model: str = OLLAMA_EMBED_MODEL):
+        from backend.ollama_pool import get_ollama_pool  # Loads the SDK, so only when Ollama is used
+        self._pool = get_ollama_pool()
+        self.model = model
+        self.model_id = f"ollama:{model}"
+
+    def is_available(self) -> bool:
+        if self._pool.has_model(self.model):
+            return True
+        logging.warning(f"No healthy Ollama host serves embedding model '{self.model}'.")
+        return False
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        if len(batches) <= 1:
+            return super().embed(texts)
+        # One batch in flight per healthy host, so indexing scales with the hosts
+        with ThreadPoolExecutor(max_workers=max(1, self._pool.healthy_count())) as executor:
+            vectors = list(executor.map(self._embed, batches))
+        return normalize_rows(np.vstack(vectors).astype(np.float32))
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        response = self._pool.run(self.model, lambda client: client.embed(model=self.model, input=texts))
+        return np.asarray(response["embeddings"], dtype=np.float32)
+
+
+class HashingEmbedder(Embedder):
+    """Feature-hashed bag of words and character trigrams. Fast, offline and deterministic.
+
+    It matches shared words and word fragments ("law" finds "Law School"),
+    not meaning, so it is a stand-in rather than a substitute for a real model.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+        self.model_id = f"hashing:{dimensions}"
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(text.lower()):
+                padded = f" {word} "
+                features = [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+                for feature in features:
+                    h = zlib.crc32(feature.encode())
+                    # The top bit picks the sign so colliding features tend to cancel out
+                    vectors[row, h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        return vectors
+
+
+def get_embedder(name: str = EMBEDDER) -> Embedder:
+    """Returns the configured embedder, falling back to hashing when Ollama can't serve."""
+    if name in ("ollama", "auto"):
+        try:
+            embedder = OllamaEmbedder()
+            if name == "ollama" or embedder.is_available():
+                return embedder
+        except ImportError:
+            logging.warning("The ollama package is not installed; using the hashing embedder.")
+        logging.info("Semantic search is using the local hashing embedder.")
+    return HashingEmbedder()
@@ -0,0 +1,215 @@
+"""Persistent queue of message generation jobs, drained by separate worker processes.
+
+The web app submits a job and gets its id back immediately; workers started
+with ``python -m backend.worker`` claim jobs, run the generation and store the
+result. Jobs live in SQLite, so queued and failed jobs survive restarts of
+either side, and a job whose worker died is picked up again once its lease
+expires.
+"""
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Dict
+
+from backend.coalescing import normalize_details
+from backend.queue_db import connect
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.db")
+JOB_LEASE = float(os.getenv("JOB_LEASE", "600"))  # Seconds a worker may hold a job before it is requeued
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+WORKER_HEARTBEAT_TIMEOUT = 30.0  # Seconds without a heartbeat before a worker counts as gone
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    details TEXT NOT NULL,  -- JSON
+    engine TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, done, failed
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_initialized = set()
+
+
+def open_jobs_db(path: str = JOBS_DB_PATH):
+    """Opens the jobs database, creating its tables on first use in this process."""
+    conn = connect(path)
+    if path not in _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def submit_job(details: Dict[str, Any], engine: str | None = None, path: str = JOBS_DB_PATH) -> str:
+    """Queues a generation job and returns its id without waiting for it.
+
+    If an identical job (same engine and normalized details) is still queued
+    or running, its id is returned instead, so a double click or two
+    organizers generating for the same delegate share one generation.
+    """
+    payload = json.dumps(normalize_details(details), sort_keys=True)
+    conn = open_jobs_db(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")  # Two identical submits must not both miss each other
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE details = ? AND engine IS ? AND status IN ('queued', 'running')",
+                (payload, engine),
+            ).fetchone()
+            if row is not None:
+                job_id = row["id"]
+                conn.execute(
+                    "INSERT INTO counters (name, value) VALUES ('coalesced', 1)"
+                    " ON CONFLICT(name) DO UPDATE SET value = value + 1"
+                )
+            else:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, details, engine, created_at) VALUES (?, ?, ?, ?)",
+                    (job_id, payload, engine, time.time()),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    if row is not None:
+        logging.info(f"Joined generation job {job_id}, already queued for the same details.")
+    return job_id
+
+
+def get_job(job_id: str, path: str = JOBS_DB_PATH) -> Dict[str, Any] | None:
+    """Returns the job's status, result and error, or None if there is no such job."""
+    conn = open_jobs_db(path)
+    try:
+        row = conn.execute(
+            "SELECT id, status, result, error, attempts, created_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def retry_job(job_id: str, path: str = JOBS_DB_PATH) -> bool:
+    """Puts a failed job back in the queue. Returns False if it was not failed."""
+    conn = open_jobs_db(path)
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = 0, error = NULL WHERE id = ? AND status = 'failed'",
+            (job_id,),
+        )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def queue_stats(path: str = JOBS_DB_PATH) -> Dict[str, int]:
+    """Returns job counts by status, the number of live workers and of submits that joined an existing job."""
+    conn = open_jobs_db(path)
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        workers = conn.execute(
+            "SELECT COUNT(*) FROM workers WHERE last_seen > ?", (time.time() - WORKER_HEARTBEAT_TIMEOUT,)
+        ).fetchone()[0]
+        coalesced = conn.execute("SELECT value FROM counters WHERE name = 'coalesced'").fetchone()
+    finally:
+        conn.close()
+    return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")} | {
+        "workers": workers,
+        "coalesced": coalesced[0] if coalesced else 0,
+    }
+
+
+# --- Worker side ---
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def heartbeat(conn, worker_id: str) -> None:
+    conn.execute(
+        "INSERT INTO workers (id, last_seen) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET last_seen = excluded.last_seen",
+        (worker_id, time.time()),
+    )
+
+
+def claim_job(conn, worker_id: str) -> Dict[str, Any] | None:
+    """Atomically takes the oldest queued job, or one whose worker's lease ran out."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")  # Take the write lock so two workers can't claim the same job
+    try:
+        row = conn.execute(
+            "SELECT id, details, engine, attempts FROM jobs"
+            " WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < ?)"
+            " ORDER BY created_at LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        if row["attempts"] >= JOB_MAX_ATTEMPTS:
+            # Its workers keep dying on it; stop handing it out
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                ("Worker lost the job too many times.", now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            return claim_job(conn, worker_id)
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_expires_at = ? WHERE id = ?",
+            (worker_id, now + JOB_LEASE, row["id"]),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return {"id": row["id"], "details": json.loads(row["details"]), "engine": row["engine"]}
+
+
+def renew_lease(conn, job_id: str, worker_id: str) -> bool:
+    """Extends the lease on a job ``worker_id`` is running. False if the job is no longer its own."""
+    renewed = conn.execute(
+        "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+        (time.time() + JOB_LEASE, job_id, worker_id),
+    )
+    return renewed.rowcount > 0
+
+
+def finish_job(conn, job_id: str, worker_id: str, result: str | None, error: str | None = None) -> bool:
+    """Stores a job's outcome. A None result marks the job failed.
+
+    Returns False, storing nothing, if the lease ran out and another worker
+    has taken the job since.
+    """
+    finished = conn.execute(
+        "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL"
+        " WHERE id = ? AND worker = ? AND status = 'running'",
+        ("done" if result is not None else "failed", result, error, time.time(), job_id, worker_id),
+    )
+    if finished.rowcount == 0:
+        logging.warning(f"Generation job {job_id} was reassigned before worker {worker_id} finished it.")
+        return False
+    if result is None:
+        logging.error(f"Generation job {job_id} failed: {error}")
+    return True
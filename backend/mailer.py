@@ -0,0 +1,379 @@
+"""Outbound email sending: a persistent outbox drained through pooled SMTP connections.
+
+Messages are queued in a SQLite outbox, so nothing is lost if the app restarts.
+Worker threads claim due messages, send them over reused SMTP connections and
+retry transient failures with exponential backoff. A per-domain cap keeps us
+from flooding any one provider (e.g. gmail.com) with parallel deliveries.
+"""
+import logging
+import os
+import queue
+import random
+import re
+import smtplib
+import threading
+import time
+from collections import deque
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+from backend.queue_db import connect
+
+# --- Configuration ---
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USERNAME or "gds-lucknow-mun@localhost")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))  # Also the number of sender threads
+SMTP_PER_DOMAIN_LIMIT = int(os.getenv("SMTP_PER_DOMAIN_LIMIT", "2"))
+SMTP_MAX_ATTEMPTS = int(os.getenv("SMTP_MAX_ATTEMPTS", "5"))
+SMTP_RETRY_BASE_DELAY = float(os.getenv("SMTP_RETRY_BASE_DELAY", "30"))  # Seconds, doubled per attempt
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.db")
+
+DEFAULT_SUBJECT = "Invitation: Global Diplomatic Summit-Lucknow MUN 2025"
+IDLE_CONNECTION_CHECK = 30.0  # Seconds idle after which a pooled connection is NOOP-checked
+SENT_FLUSH_INTERVAL = 2.0  # Seconds between on_sent callbacks, so delegate updates are batched
+MAX_RETRY_DELAY = 3600.0
+SENDING_LEASE = 300.0  # A message 'sending' for longer than this was orphaned by a crash
+RATE_WINDOW = 60.0  # Seconds of recent sends behind stats()["messages_per_second"]
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    delegate_name TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued, sending, sent, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    claimed_at REAL,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+class OutboundEmail(NamedTuple):
+    id: int
+    recipient: str
+    subject: str
+    body: str
+    delegate_name: str | None
+
+
+def is_valid_email(address: str) -> bool:
+    return bool(EMAIL_PATTERN.match(address.strip()))
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` logged-in SMTP connections open and hands them out for reuse."""
+
+    def __init__(self, size: int = SMTP_POOL_SIZE, host: str = SMTP_HOST, port: int = SMTP_PORT,
+                 username: str | None = SMTP_USERNAME, password: str | None = SMTP_PASSWORD,
+                 starttls: bool = SMTP_STARTTLS):
+        self.host, self.port = host, port
+        self.username, self.password, self.starttls = username, password, starttls
+        self._idle = queue.LifoQueue()  # (connection, last_used); LIFO keeps hot connections hot
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password or "")
+        return conn
+
+    def acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open()
+                if time.monotonic() - last_used < IDLE_CONNECTION_CHECK:
+                    return conn
+                try:
+                    if conn.noop()[0] == 250:
+                        return conn
+                except smtplib.SMTPException:
+                    pass
+                self._close(conn)  # Server dropped it while idle; try the next one
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False) -> None:
+        if broken:
+            self._close(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP) -> None:
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+
+class EmailSender:
+    """Drains the outbox with a pool of worker threads sharing pooled SMTP connections.
+
+    Args:
+        outbox_path: SQLite file holding the persistent outbox.
+        pool: Connection pool to send through; one is created from settings if omitted.
+        workers: Number of sender threads (defaults to the pool size).
+        per_domain_limit: Maximum concurrent deliveries to one recipient domain.
+        on_sent: Called with a list of OutboundEmails accepted by the server,
+            batched every SENT_FLUSH_INTERVAL seconds from a single thread.
+    """
+
+    def __init__(self, outbox_path: str = OUTBOX_PATH, pool: SMTPConnectionPool | None = None,
+                 workers: int = SMTP_POOL_SIZE, per_domain_limit: int = SMTP_PER_DOMAIN_LIMIT,
+                 on_sent: Callable[[List[OutboundEmail]], None] | None = None):
+        self.outbox_path = outbox_path
+        self.pool = pool or SMTPConnectionPool()
+        self.workers = workers
+        self.per_domain_limit = per_domain_limit
+        self.on_sent = on_sent
+        self._claim_lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}  # domain -> deliveries in progress
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._sent_batch: List[OutboundEmail] = []
+        self._sent_times = deque()  # Monotonic times of sends within the last RATE_WINDOW
+        self._started_at = None
+
+        # Messages left 'sending' by a crash or restart are reclaimed by _claim once their lease expires
+        conn = connect(outbox_path)
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+    # --- Queueing ---
+
+    def enqueue(self, recipient: str, body: str, subject: str = DEFAULT_SUBJECT,
+                delegate_name: str | None = None) -> int:
+        """Queues one message and returns its outbox id."""
+        return self.enqueue_batch([(recipient, body, subject, delegate_name)])[0]
+
+    def enqueue_batch(self, messages: Iterable[tuple]) -> list:
+        """Queues ``(recipient, body, subject, delegate_name)`` tuples in one transaction."""
+        now = time.time()
+        ids = []
+        conn = connect(self.outbox_path)
+        try:
+            conn.execute("BEGIN")
+            for recipient, body, subject, delegate_name in messages:
+                recipient = recipient.strip()
+                if not is_valid_email(recipient):
+                    raise ValueError(f"Invalid email address: {recipient!r}")
+                cur = conn.execute(
+                    "INSERT INTO outbox (recipient, domain, subject, body, delegate_name, next_attempt_at, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (recipient, recipient.rsplit("@", 1)[1].lower(), subject or DEFAULT_SUBJECT, body, delegate_name, now, now),
+                )
+                ids.append(cur.lastrowid)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        self._wakeup.set()
+        return ids
+
+    def stats(self) -> Dict[str, float]:
+        """Returns outbox counts by status and the send rate over the last RATE_WINDOW seconds."""
+        conn = connect(self.outbox_path)
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        finally:
+            conn.close()
+        now = time.monotonic()
+        with self._claim_lock:
+            recent = self._record_send(now, sent=False)
+        # Shorter than the window right after start(), so early rates aren't understated
+        elapsed = min(RATE_WINDOW, now - self._started_at) if self._started_at else 0
+        return {
+            "queued": counts.get("queued", 0) + counts.get("sending", 0),
+            "sent": counts.get("sent", 0),
+            "failed": counts.get("failed", 0),
+            "messages_per_second": recent / elapsed if elapsed else 0.0,
+        }
+
+    # --- Workers ---
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._started_at = time.monotonic()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"email-sender-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        flusher = threading.Thread(target=self._flush_sent_loop, name="email-sender-flush", daemon=True)
+        flusher.start()
+        self._threads.append(flusher)
+        logging.info(f"Email sender started with {self.workers} worker(s) for {self.pool.host}:{self.pool.port}.")
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.pool.close_all()
+
+    def _run(self) -> None:
+        conn = connect(self.outbox_path)
+        try:
+            while not self._stopping.is_set():
+                message = self._claim(conn)
+                if message is None:
+                    self._wakeup.wait(timeout=1.0)
+                    self._wakeup.clear()
+                    continue
+                try:
+                    self._deliver(conn, message)
+                finally:
+                    with self._claim_lock:
+                        domain = message.recipient.rsplit("@", 1)[1].lower()
+                        self._in_flight[domain] -= 1
+                    self._wakeup.set()  # A domain slot freed up
+        finally:
+            conn.close()
+
+    def _claim(self, conn) -> OutboundEmail | None:
+        """Marks the next due message whose domain has a free slot as 'sending'.
+
+        A message whose sender died mid-send (still 'sending' after
+        SENDING_LEASE) is due again, like an expired job lease in backend.jobs.
+        """
+        with self._claim_lock:
+            now = time.time()
+            expired = now - SENDING_LEASE
+            saturated = [d for d, n in self._in_flight.items() if n >= self.per_domain_limit]
+            placeholders = ",".join("?" * len(saturated))
+            row = conn.execute(
+                "SELECT id, recipient, domain, subject, body, delegate_name FROM outbox"
+                " WHERE ((status = 'queued' AND next_attempt_at <= ?) OR (status = 'sending' AND claimed_at < ?))"
+                + (f" AND domain NOT IN ({placeholders})" if saturated else "")
+                + " ORDER BY next_attempt_at LIMIT 1",
+                (now, expired, *saturated),
+            ).fetchone()
+            if row is None:
+                return None
+            # Guarded update so a sender in another process can't claim it too
+            claimed = conn.execute(
+                "UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id = ?"
+                " AND (status = 'queued' OR (status = 'sending' AND claimed_at < ?))",
+                (now, row["id"], expired),
+            )
+            if claimed.rowcount == 0:
+                return None
+            self._in_flight[row["domain"]] = self._in_flight.get(row["domain"], 0) + 1
+        return OutboundEmail(row["id"], row["recipient"], row["subject"], row["body"], row["delegate_name"])
+
+    def _deliver(self, conn, message: OutboundEmail) -> None:
+        email = EmailMessage()
+        email["From"] = SMTP_FROM
+        email["To"] = message.recipient
+        email["Subject"] = message.subject
+        email["Message-ID"] = make_msgid(domain="gds-lucknow-mun")
+        email.set_content(message.body)
+
+        try:
+            smtp = self.pool.acquire()
+        except Exception as e:
+            self._retry(conn, message, f"connect: {e}")
+            return
+        broken = False
+        try:
+            smtp.send_message(email)
+        except smtplib.SMTPRecipientsRefused as e:
+            code = next(iter(e.recipients.values()))[0]
+            if 400 <= code < 500:
+                self._retry(conn, message, str(e))
+            else:
+                self._fail(conn, message, str(e))  # Permanent (5xx): retrying won't help
+            return
+        except smtplib.SMTPResponseException as e:
+            broken = e.smtp_code in (421,)  # Server is closing the connection
+            if 400 <= e.smtp_code < 500:
+                self._retry(conn, message, str(e))
+            else:
+                self._fail(conn, message, str(e))
+            return
+        except (smtplib.SMTPException, OSError) as e:
+            broken = True
+            self._retry(conn, message, str(e))
+            return
+        finally:
+            self.pool.release(smtp, broken=broken)
+
+        conn.execute("UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1 WHERE id = ?",
+                     (time.time(), message.id))
+        with self._claim_lock:
+            self._record_send(time.monotonic())
+            self._sent_batch.append(message)
+
+    def _record_send(self, now: float, sent: bool = True) -> int:
+        """Drops send times older than RATE_WINDOW (and records one if ``sent``). Call under _claim_lock."""
+        if sent:
+            self._sent_times.append(now)
+        while self._sent_times and self._sent_times[0] < now - RATE_WINDOW:
+            self._sent_times.popleft()
+        return len(self._sent_times)
+
+    def _flush_sent_loop(self) -> None:
+        while not self._stopping.wait(SENT_FLUSH_INTERVAL):
+            self._flush_sent()
+        self._flush_sent()
+
+    def _flush_sent(self) -> None:
+        with self._claim_lock:
+            batch, self._sent_batch = self._sent_batch, []
+        if batch and self.on_sent:
+            try:
+                self.on_sent(batch)
+            except Exception as e:
+                logging.error(f"Post-send update failed for {len(batch)} message(s): {e}")
+
+    def _retry(self, conn, message: OutboundEmail, error: str) -> None:
+        attempts = conn.execute("SELECT attempts FROM outbox WHERE id = ?", (message.id,)).fetchone()[0] + 1
+        if attempts >= SMTP_MAX_ATTEMPTS:
+            self._fail(conn, message, error)
+            return
+        # Exponential backoff with jitter so retries to a busy server spread out
+        delay = min(MAX_RETRY_DELAY, SMTP_RETRY_BASE_DELAY * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+        conn.execute(
+            "UPDATE outbox SET status = 'queued', attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (attempts, time.time() + delay, error, message.id),
+        )
+        logging.warning(f"Send to {message.recipient} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+
+    def _fail(self, conn, message: OutboundEmail, error: str) -> None:
+        conn.execute("UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ? WHERE id = ?",
+                     (error, message.id))
+        logging.error(f"Giving up on email to {message.recipient}: {error}")
@@ -0,0 +1,219 @@
+"""Load balancing across several Ollama servers.
+
+``OLLAMA_HOSTS`` lists the servers (comma-separated URLs); without it the SDK
+default host (``OLLAMA_HOST`` or localhost) is the only node. Each request goes
+to the healthy node with the fewest requests in flight from this process that
+serves the model. A node that can't be reached or answers with a server error
+is taken out of rotation at once and retried by the background health check,
+which puts it back when it answers again.
+"""
+import itertools
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Set
+
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", "").split(",") if h.strip()]
+HEALTH_CHECK_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "15"))  # Seconds between node checks
+HEALTH_CHECK_TIMEOUT = 3.0
+RECHECK_WAIT = 5.0  # Longest a request waits for an early health check when every node looks down
+
+
+class NoHealthyHost(ConnectionError):
+    """Raised when no Ollama node is up and serving the requested model."""
+
+
+def _served_models(response) -> Set[str]:
+    return {m.get("model") or m.get("name") for m in response["models"]}
+
+
+def _serves(models: Set[str], model: str) -> bool:
+    return model in models or (":" not in model and f"{model}:latest" in models)
+
+
+class OllamaNode:
+    """One Ollama server, with its own clients and load counters."""
+
+    def __init__(self, ollama, host: str | None):
+        self.host = host
+        self.label = host or "default"
+        self.client = ollama.Client(host=host)
+        self._probe = ollama.Client(host=host, timeout=HEALTH_CHECK_TIMEOUT)
+        self.healthy = True  # Optimistic until the first check says otherwise
+        self.models: Set[str] | None = None  # Unknown until the first check
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+
+    def check(self) -> bool:
+        """Asks the node for its models. Returns True if it answered."""
+        try:
+            self.models = _served_models(self._probe.list())
+            return True
+        except Exception as e:
+            logging.debug(f"Ollama host {self.label} health check failed: {e}")
+            return False
+
+
+class OllamaPool:
+    """Least-outstanding-requests balancing over a set of Ollama nodes."""
+
+    def __init__(self, hosts: List[str] | None = None):
+        import httpx  # Installed with the ollama SDK
+        import ollama  # Deferred so the SDK is only loaded when Ollama is used
+        self._ollama = ollama
+        # The SDK turns a refused connection into ConnectionError; timeouts and
+        # dropped connections surface as httpx transport errors
+        self._transport_errors = (ConnectionError, httpx.TransportError)
+        self.nodes = [OllamaNode(ollama, host) for host in (hosts or OLLAMA_HOSTS or [None])]
+        self._lock = threading.Lock()
+        self._checked = threading.Condition(self._lock)  # Notified after each health check pass
+        self._check_passes = 0
+        self._wake_checker = threading.Event()
+        self._turn = itertools.count()  # Rotates ties so idle nodes share the load
+        self._checker = None
+
+    # --- Requests ---
+
+    def run(self, model: str, request: Callable[[Any], Any]) -> Any:
+        """Calls ``request(client)`` on the best node for ``model``, moving on to the next if it fails.
+
+        Connection errors and 5xx responses take the node out of rotation; a
+        node that lacks the model is skipped. Anything else is raised, since
+        every node would fail the request the same way.
+        """
+        tried = set()
+        while True:
+            with self.acquire(model, exclude=tried) as node:
+                try:
+                    return request(node.client)
+                except self._ollama.ResponseError as e:
+                    if e.status_code == 404:
+                        logging.warning(f"Ollama host {node.label} does not serve '{model}'.")
+                        with self._lock:
+                            node.models = (node.models or set()) - {model}
+                    elif e.status_code >= 500:
+                        self._eject(node, e)
+                    else:
+                        raise
+                except self._transport_errors as e:
+                    self._eject(node, e)
+                tried.add(node)
+
+    @contextmanager
+    def acquire(self, model: str, exclude=()):
+        """Reserves the healthy node with the fewest outstanding requests that serves ``model``."""
+        self._start_checker()
+        node = self._pick(model, exclude)
+        if node is None:
+            # Everything looks down; ask for an early check rather than waiting for the next pass
+            self._await_check()
+            node = self._pick(model, exclude)
+        if node is None:
+            raise NoHealthyHost(f"No healthy Ollama host serves '{model}'.")
+        try:
+            yield node
+        finally:
+            with self._lock:
+                node.outstanding -= 1
+                node.requests += 1
+
+    def has_model(self, model: str) -> bool:
+        """True if at least one healthy node serves ``model``."""
+        self._start_checker()
+        if all(node.models is None for node in self.nodes):
+            self._await_check()  # The first pass is already under way
+        with self._lock:
+            return any(node.healthy and node.models is not None and _serves(node.models, model) for node in self.nodes)
+
+    def healthy_count(self) -> int:
+        with self._lock:
+            return sum(node.healthy for node in self.nodes)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-node health and load, for logs and dashboards."""
+        with self._lock:
+            return {
+                node.label: {
+                    "healthy": node.healthy,
+                    "outstanding": node.outstanding,
+                    "requests": node.requests,
+                    "failures": node.failures,
+                }
+                for node in self.nodes
+            }
+
+    # --- Health ---
+
+    def check_all(self) -> None:
+        """Checks every node and updates which ones are in rotation."""
+        for node in self.nodes:
+            up = node.check()
+            with self._lock:
+                if up and not node.healthy:
+                    logging.info(f"Ollama host {node.label} is back in rotation.")
+                elif not up and node.healthy:
+                    logging.warning(f"Ollama host {node.label} failed its health check; out of rotation.")
+                node.healthy = up
+
+    def _start_checker(self) -> None:
+        if self._checker is not None:
+            return
+        with self._lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._check_loop, name="ollama-health", daemon=True)
+        self._checker.start()
+
+    def _check_loop(self) -> None:
+        while True:
+            self.check_all()
+            with self._checked:
+                self._check_passes += 1
+                self._checked.notify_all()
+            self._wake_checker.wait(HEALTH_CHECK_INTERVAL)
+            self._wake_checker.clear()
+
+    def _await_check(self) -> None:
+        """Wakes the health checker and waits for its next pass, for at most RECHECK_WAIT seconds."""
+        with self._checked:
+            target = self._check_passes + 1
+            self._wake_checker.set()
+            self._checked.wait_for(lambda: self._check_passes >= target, timeout=RECHECK_WAIT)
+
+    def _pick(self, model: str, exclude) -> OllamaNode | None:
+        with self._lock:
+            candidates = [
+                node for node in self.nodes
+                if node.healthy and node not in exclude
+                and (node.models is None or _serves(node.models, model))
+            ]
+            if not candidates:
+                return None
+            # Least outstanding requests; ties go round-robin
+            start = next(self._turn) % len(candidates)
+            rotated = candidates[start:] + candidates[:start]
+            node = min(rotated, key=lambda n: n.outstanding)
+            node.outstanding += 1
+            return node
+
+    def _eject(self, node: OllamaNode, error: Exception) -> None:
+        with self._lock:
+            node.failures += 1
+            if node.healthy:
+                logging.warning(f"Ollama host {node.label} failed a request ({error}); out of rotation.")
+            node.healthy = False
+
+
+_pool: OllamaPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_ollama_pool() -> OllamaPool:
+    """Returns the process-wide pool for ``OLLAMA_HOSTS``."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OllamaPool()
+        return _pool
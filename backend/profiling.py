@@ -0,0 +1,86 @@
+"""Opt-in timing of Streamlit script reruns.
+
+A ``RerunProfiler`` times named sections of one rerun (nested sections are
+kept with their depth, in start order) and can wrap the whole rerun in
+cProfile. When it is disabled, ``section()`` only yields, so the hooks can
+stay in the app permanently.
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from typing import List, NamedTuple
+
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "0") == "1"  # Profile every session, no toggle needed
+PROFILE_CPROFILE = os.getenv("PROFILE_CPROFILE", "0") == "1"  # Also capture cProfile output
+PROFILE_HISTORY = 50  # Reruns kept in the per-session duration history
+CPROFILE_LINES = 30  # Functions listed in the cProfile report
+
+
+class SectionTiming(NamedTuple):
+    name: str
+    depth: int  # 0 for top-level sections
+    seconds: float
+
+
+class RerunReport(NamedTuple):
+    started_at: float  # Wall-clock time the rerun began
+    total: float  # Seconds from profiler start to finish()
+    sections: List[SectionTiming]
+    profile: str | None  # cProfile report, if captured
+
+
+class RerunProfiler:
+    """Collects section timings (and optionally cProfile stats) for one rerun."""
+
+    def __init__(self, enabled: bool, use_cprofile: bool = False):
+        self.enabled = enabled
+        self.note = None  # Why cProfile output is missing, when it was asked for
+        self._started = time.perf_counter()
+        self._started_at = time.time()
+        self._depth = 0
+        self._sections: List[SectionTiming | None] = []
+        self._profile = None
+        if enabled and use_cprofile:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self._profile = profile
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process, and
+                # another session's rerun is holding it
+                self.note = "cProfile is busy with another session's rerun."
+
+    @contextmanager
+    def section(self, name: str):
+        """Times the enclosed block as ``name``."""
+        if not self.enabled:
+            yield
+            return
+        index = len(self._sections)
+        self._sections.append(None)  # Reserve the slot so parents list before their children
+        depth = self._depth
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth = depth
+            self._sections[index] = SectionTiming(name, depth, time.perf_counter() - started)
+
+    def finish(self) -> RerunReport | None:
+        """Stops profiling and returns the report, or None when disabled."""
+        if not self.enabled:
+            return None
+        total = time.perf_counter() - self._started
+        profile_text = None
+        if self._profile is not None:
+            self._profile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(CPROFILE_LINES)
+            profile_text = out.getvalue()
+            self._profile = None
+        sections = [s for s in self._sections if s is not None]
+        return RerunReport(self._started_at, total, sections, profile_text)
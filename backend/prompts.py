@@ -0,0 +1,114 @@
+import math
+import re
+from typing import Dict, Any
+
+# Increased temperature for more creativity
+DEFAULT_TEMPERATURE = 0.75
+
+# --- Output length budgeting ---
+# English prose averages ~1.35 tokens per word for the models we use
+TOKENS_PER_WORD = 1.35
+# Formal invites run a little longer, conversational ones a little shorter
+TONE_LENGTH_FACTORS = {"Formal": 1.15, "Semi-formal": 1.0, "Conversational": 0.9}
+# Slack over the expected length so a slightly wordier rewrite is not cut off
+LENGTH_HEADROOM = 1.3
+MIN_OUTPUT_TOKENS = 160
+MAX_OUTPUT_TOKENS = 400
+
+SIGNATURE_TAIL = "Global Diplomatic Summit-Lucknow MUN 2025"
+# Anything after the signature block is a postamble ("Note: ...", "---", ...).
+# A "Note:" paragraph can also be part of the body (a deadline, say), so notes
+# are not stop sequences; trim_generated_message cuts them after the signature.
+# Groq accepts at most four stop sequences.
+STOP_SEQUENCES = [f"\n{SIGNATURE_TAIL}\n", "\n\n---"]
+
+# Chatty lead-ins like "Here's the personalized message:" or "Subject: ..."
+_PREAMBLE_LINE = re.compile(
+    r"^\W*((here('s| is| are)|sure|certainly|okay|ok|of course|absolutely|below is)\b|subject:)",
+    re.IGNORECASE,
+)
+
+# Base template that can be used without personalization
+BASE_TEMPLATE = """Hi!
+
+I'm part of the Organizing Committee for Global Diplomatic Summit-Lucknow MUN 2025. We're inviting bright minds to be a part of our upcoming conference that focuses on global challenges and leadership development.
+
+The conference will feature multiple specialized committees addressing pressing international issues, with opportunities for both beginners and experienced delegates.
+
+Would you be interested in learning more about the committees, awards, and registration process? I'd be happy to provide additional information.
+
+Looking forward to hearing from you!
+
+Best regards,
+[Your Name]
+Organizing Committee
+Global Diplomatic Summit-Lucknow MUN 2025"""
+
+# Updated System Prompt for Personalization & Creativity
+SYSTEM_PROMPT = """You are an assistant that personalizes invitation messages with moderate creativity.
+Given a template message and specific details (like a name and other optional parameters), rewrite the message to include the details naturally.
+Paraphrase the template creatively (around 50% flexibility) while maintaining the core information, key event details (Global Diplomatic Summit-Lucknow MUN 2025, focus on global challenges/leadership), and the overall purpose of the invitation.
+Include any provided custom fields such as committee preferences, experience level, special invitations, deadlines, etc. naturally in the text.
+Adjust the tone according to the specified preference (Formal, Semi-formal, or Conversational) if provided, otherwise use a semi-formal tone.
+Do not add unrelated information. Only output the personalized message."""
+
+
+def build_user_prompt(details: Dict[str, Any]) -> str:
+    """Builds the user prompt shared by every provider from the template and details."""
+    # Build customization prompt with all available details
+    customization_details = "Personalize for:\n"
+    for key, value in details.items():
+        if key != 'tone': # Don't list tone as a detail to include
+            customization_details += f"- {key}: {value}\n"
+
+    # Construct the user prompt with template and details
+    return f"Template:\n{BASE_TEMPLATE}\n\n{customization_details}\n\nRewrite the template including these details naturally, using the specified tone if provided."
+
+
+def temperature_for_tone(details: Dict[str, Any]) -> float:
+    """Adjusts temperature based on tone preference, otherwise uses the default."""
+    tone = details.get("tone")
+    if tone == "Formal":
+        return 0.4  # Lower for formal
+    if tone == "Conversational":
+        return 0.8  # Higher for conversational
+    return DEFAULT_TEMPERATURE
+
+
+def output_token_budget(details: Dict[str, Any], template: str | None = None) -> int:
+    """Estimates how many output tokens a rewrite of ``template`` for ``details`` needs.
+
+    Scales the template's word count by the requested tone, adds room for each
+    detail to be woven in, and clamps to [MIN_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS].
+    """
+    words = len((template or BASE_TEMPLATE).split())
+    for key, value in details.items():
+        if key != 'tone':
+            # The value itself plus roughly a clause of connective text
+            words += len(str(value).split()) + 8
+    words *= TONE_LENGTH_FACTORS.get(details.get("tone"), 1.0)
+    budget = math.ceil(words * TOKENS_PER_WORD * LENGTH_HEADROOM)
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, budget))
+
+
+def trim_generated_message(text: str) -> str:
+    """Strips model preambles/postambles and restores a signature cut by a stop sequence."""
+    lines = text.strip().splitlines()
+    # Drop lead-in lines (and the blank lines after them) before the greeting
+    while lines and (not lines[0].strip() or _PREAMBLE_LINE.match(lines[0])):
+        lines.pop(0)
+
+    # Cut everything after the last line of the signature block
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i].strip() == SIGNATURE_TAIL:
+            lines = lines[:i + 1]
+            break
+    else:
+        # The signature stop sequence swallows the final line, so put it back
+        # (dropping any postamble the model wrote after a shortened signature)
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].strip() == "Organizing Committee":
+                lines = lines[:i + 1] + [SIGNATURE_TAIL]
+                break
+
+    return "\n".join(lines).strip()
@@ -0,0 +1,137 @@
+"""Pluggable registry of LLM providers used for message personalization.
+
+Providers are registered by name against a ``"module:attribute"`` spec and are
+only imported the first time they are used, so the ``ollama`` and ``groq`` SDKs
+are never loaded unless the configuration actually asks for them.
+"""
+import importlib
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List
+
+# Comma-separated provider names, tried in order until one succeeds
+PROVIDERS_ENV_VAR = "LLM_PROVIDERS"
+DEFAULT_PROVIDERS = "ollama,groq"
+
+
+class LLMProvider:
+    """Base class for providers. Subclasses override ``is_available`` and ``generate``."""
+
+    name = "base"
+    model = ""  # What generations come from; part of the request-coalescing key, so set it on the class
+
+    def is_available(self) -> bool:
+        """Cheap readiness check run before every generation attempt."""
+        return True
+
+    def generate(self, details: Dict[str, Any]) -> str | None:
+        """Returns the personalized message, or None if generation failed."""
+        raise NotImplementedError
+
+
+# name -> "module:attribute" spec or a factory returning an LLMProvider
+_REGISTRY: Dict[str, str | Callable[[], LLMProvider]] = {
+    "ollama": "backend.providers.ollama_provider:OllamaProvider",
+    "groq": "backend.providers.groq_provider:GroqProvider",
+    "llamacpp": "backend.providers.llamacpp_provider:LlamaCppProvider",
+}
+_INSTANCES: Dict[str, LLMProvider | None] = {}  # None: loading failed, don't retry every call
+
+# provider name -> running totals, for latency and truncation reporting
+_STATS: Dict[str, Dict[str, float]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def register_provider(name: str, target: str | Callable[[], LLMProvider]) -> None:
+    """Registers (or replaces) a provider under ``name``.
+
+    Args:
+        name: The name used in the ``LLM_PROVIDERS`` setting.
+        target: Either a ``"package.module:ClassName"`` spec, imported lazily on
+            first use, or a zero-argument factory returning an ``LLMProvider``.
+    """
+    _REGISTRY[name] = target
+    _INSTANCES.pop(name, None)
+
+
+def available_providers() -> List[str]:
+    """Returns the names of all registered providers without loading them."""
+    return list(_REGISTRY)
+
+
+def get_provider(name: str) -> LLMProvider | None:
+    """Returns the provider instance for ``name``, importing it on first use (None if it can't be loaded)."""
+    if name in _INSTANCES:
+        return _INSTANCES[name]
+    target = _REGISTRY.get(name)
+    if target is None:
+        logging.error(f"Unknown LLM provider '{name}'. Registered: {available_providers()}")
+        return None
+    try:
+        if isinstance(target, str):
+            module_name, _, attr = target.partition(":")
+            factory = getattr(importlib.import_module(module_name), attr)
+        else:
+            factory = target
+        provider = factory()
+    except Exception as e:
+        # Typically a missing SDK; skip this provider rather than failing the request.
+        # Remembered until the provider is registered again, so it warns once.
+        logging.warning(f"Could not load LLM provider '{name}': {e}")
+        _INSTANCES[name] = None
+        return None
+    _INSTANCES[name] = provider
+    return provider
+
+
+def provider_model(name: str) -> str | None:
+    """Returns the ``model`` of provider ``name`` without creating it, so no SDK is loaded.
+
+    Spec-registered providers are read from their class; a factory-registered
+    one is only known once it has been created.
+    """
+    if _INSTANCES.get(name) is not None:
+        return _INSTANCES[name].model
+    target = _REGISTRY.get(name)
+    if not isinstance(target, str):
+        return None
+    module_name, _, attr = target.partition(":")
+    try:
+        # Provider modules defer their SDK imports to __init__
+        return getattr(importlib.import_module(module_name), attr).model
+    except Exception:
+        return None
+
+
+def configured_providers() -> List[str]:
+    """Returns provider names from the ``LLM_PROVIDERS`` setting, in priority order."""
+    raw = os.getenv(PROVIDERS_ENV_VAR, DEFAULT_PROVIDERS)
+    return [name.strip().lower() for name in raw.split(",") if name.strip()]
+
+
+def record_generation(provider: str, latency: float, output_tokens: int | None, truncated: bool) -> None:
+    """Records one generation call. Providers call this after every completion."""
+    with _STATS_LOCK:
+        stats = _STATS.setdefault(provider, {"calls": 0, "truncated": 0, "latency_s": 0.0, "output_tokens": 0})
+        stats["calls"] += 1
+        stats["truncated"] += int(truncated)
+        stats["latency_s"] += latency
+        stats["output_tokens"] += output_tokens or 0
+    if truncated:
+        logging.warning(f"{provider} output hit the token budget and may be truncated.")
+
+
+def generation_stats() -> Dict[str, Dict[str, float]]:
+    """Returns per-provider call count, mean latency, mean output tokens and truncation rate."""
+    with _STATS_LOCK:
+        report = {}
+        for provider, stats in _STATS.items():
+            calls = stats["calls"] or 1
+            report[provider] = {
+                "calls": stats["calls"],
+                "avg_latency_s": stats["latency_s"] / calls,
+                "avg_output_tokens": stats["output_tokens"] / calls,
+                "truncation_rate": stats["truncated"] / calls,
+            }
+        return report
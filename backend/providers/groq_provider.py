@@ -0,0 +1,69 @@
+import logging
+import os
+import time
+from typing import Dict, Any
+
+from backend.prompts import (
+    STOP_SEQUENCES, SYSTEM_PROMPT, build_user_prompt, output_token_budget,
+    temperature_for_tone, trim_generated_message,
+)
+from backend.providers import LLMProvider, record_generation
+
+GROQ_MODEL = os.getenv("GROQ_MODEL", "meta-llama/llama-4-scout-17b-16e-instruct")
+
+
+class GroqProvider(LLMProvider):
+    """Hosted generation through the Groq API."""
+
+    name = "groq"
+    model = GROQ_MODEL
+
+    def __init__(self):
+        from groq import Groq  # Deferred so the SDK is only loaded when Groq is configured
+        self._client_cls = Groq
+
+    def is_available(self) -> bool:
+        # Check if the key was loaded successfully by dotenv
+        if not os.getenv("GROQ_API_KEY"):
+            logging.error("GROQ_API_KEY not found in environment variables or .env file.")
+            return False
+        return True
+
+    def generate(self, details: Dict[str, Any]) -> str | None:
+        """Generates a personalized message using Groq based on the template and details."""
+        if not self.is_available():
+            return None
+        try:
+            client = self._client_cls() # Assumes GROQ_API_KEY is loaded into env by load_dotenv()
+            started = time.perf_counter()
+            completion = client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": build_user_prompt(details)},
+                ],
+                temperature=temperature_for_tone(details),
+                max_tokens=output_token_budget(details),  # Sized to the template and tone
+                top_p=1,
+                stream=False,
+                stop=STOP_SEQUENCES,
+            )
+            choice = completion.choices[0]
+            record_generation(
+                self.name,
+                time.perf_counter() - started,
+                completion.usage.completion_tokens if completion.usage else None,
+                truncated=choice.finish_reason == "length",
+            )
+            rewritten_text = trim_generated_message(choice.message.content)
+            logging.info("Message personalized using Groq.")
+
+            # Basic check to ensure name is included (can be improved)
+            if 'name' in details and details['name'].lower() not in rewritten_text.lower():
+                logging.warning(f"Groq output might be missing the name: {details['name']}")
+                # Optionally, prepend the name if missing, or handle differently
+                # rewritten_text = f"Hi {details['name']}, {rewritten_text}"
+            return rewritten_text.strip()
+        except Exception as e:
+            logging.error(f"Error during Groq personalization: {e}")
+            return None
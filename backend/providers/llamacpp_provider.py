@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+import time
+import urllib.request
+from typing import Dict, Any
+
+from backend.prompts import (
+    STOP_SEQUENCES, SYSTEM_PROMPT, build_user_prompt, output_token_budget,
+    temperature_for_tone, trim_generated_message,
+)
+from backend.providers import LLMProvider, record_generation
+
+# Base URL of a llama.cpp `llama-server` instance (OpenAI-compatible API)
+LLAMACPP_URL = os.getenv("LLAMACPP_URL", "http://localhost:8080")
+LLAMACPP_TIMEOUT = float(os.getenv("LLAMACPP_TIMEOUT", "120"))
+
+
+class LlamaCppProvider(LLMProvider):
+    """Local generation through a llama.cpp server. Uses only the standard library."""
+
+    name = "llamacpp"
+    model = LLAMACPP_URL.rstrip("/")  # The server decides which model it runs
+
+    def __init__(self, base_url: str = LLAMACPP_URL):
+        self.base_url = base_url.rstrip("/")
+        self.model = self.base_url
+
+    def is_available(self) -> bool:
+        """Checks the server's /health endpoint, which reports ok once the model is loaded."""
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/health", timeout=2) as resp:
+                return resp.status == 200
+        except Exception as e:
+            logging.warning(f"llama.cpp check failed: {e}. Server might not be running at {self.base_url}.")
+            return False
+
+    def generate(self, details: Dict[str, Any]) -> str | None:
+        """Generates a personalized message using the llama.cpp chat completions endpoint."""
+        payload = {
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_user_prompt(details)},
+            ],
+            "temperature": temperature_for_tone(details),
+            "max_tokens": output_token_budget(details),
+            "stop": STOP_SEQUENCES,
+        }
+        request = urllib.request.Request(
+            f"{self.base_url}/v1/chat/completions",
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            started = time.perf_counter()
+            with urllib.request.urlopen(request, timeout=LLAMACPP_TIMEOUT) as resp:
+                body = json.loads(resp.read().decode())
+            choice = body["choices"][0]
+            record_generation(
+                self.name,
+                time.perf_counter() - started,
+                body.get("usage", {}).get("completion_tokens"),
+                truncated=choice.get("finish_reason") == "length",
+            )
+            rewritten_text = trim_generated_message(choice["message"]["content"])
+            logging.info("Message personalized using llama.cpp.")
+            return rewritten_text
+        except Exception as e:
+            logging.error(f"Error during llama.cpp personalization: {e}")
+            return None
@@ -0,0 +1,71 @@
+import logging
+import os
+import time
+from typing import Dict, Any
+
+from backend.prompts import (
+    STOP_SEQUENCES, SYSTEM_PROMPT, build_user_prompt, output_token_budget,
+    temperature_for_tone, trim_generated_message,
+)
+from backend.ollama_pool import get_ollama_pool
+from backend.providers import LLMProvider, record_generation
+
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3:4b")
+
+
+class OllamaProvider(LLMProvider):
+    """Local generation through one or more Ollama servers (see backend.ollama_pool)."""
+
+    name = "ollama"
+    model = OLLAMA_MODEL
+
+    def __init__(self):
+        self._pool = get_ollama_pool()  # Loads the SDK, so only once Ollama is configured
+
+    def is_available(self) -> bool:
+        """Checks that some Ollama host in rotation serves the configured model."""
+        try:
+            # Served from the pool's health checks, so this costs no request per generation
+            if self._pool.has_model(OLLAMA_MODEL):
+                return True
+            logging.warning(f"No healthy Ollama host serves model '{OLLAMA_MODEL}'. Hosts: {self._pool.stats()}")
+            return False
+        except Exception as e:
+            logging.warning(f"Ollama check failed: {e}. Ollama might not be running or reachable.")
+            return False
+
+    def generate(self, details: Dict[str, Any]) -> str | None:
+        """Generates a personalized message using Ollama based on the template and details."""
+        try:
+            budget = output_token_budget(details)
+            started = time.perf_counter()
+            response = self._pool.run(OLLAMA_MODEL, lambda client: client.chat(
+                model=OLLAMA_MODEL,
+                messages=[
+                    {'role': 'system', 'content': SYSTEM_PROMPT},
+                    {'role': 'user', 'content': build_user_prompt(details)},
+                ],
+                options={
+                    'temperature': temperature_for_tone(details),
+                    'num_predict': budget, # Cap output length; invites run ~150 words
+                    'stop': STOP_SEQUENCES,
+                }
+            ))
+            record_generation(
+                self.name,
+                time.perf_counter() - started,
+                response.get('eval_count'),
+                truncated=response.get('done_reason') == 'length',
+            )
+            rewritten_text = trim_generated_message(response['message']['content'])
+            logging.info("Message personalized using Ollama.")
+
+            # Basic check to ensure name is included (can be improved)
+            if 'name' in details and details['name'].lower() not in rewritten_text.lower():
+                logging.warning(f"Ollama output might be missing the name: {details['name']}")
+                # Prepend name if missing
+                rewritten_text = f"Hi {details['name']},\n\n{rewritten_text}"
+            return rewritten_text.strip()
+        except Exception as e:
+            logging.error(f"Error during Ollama personalization: {e}")
+            return None
@@ -0,0 +1,15 @@
+import sqlite3
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Opens a SQLite connection tuned for a queue shared by several threads or processes.
+
+    Each thread or process should open its own connection. WAL mode lets
+    readers proceed while a writer commits, and the busy timeout makes
+    concurrent writers wait for the lock instead of failing immediately.
+    """
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)  # Autocommit; use BEGIN explicitly
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,220 @@
+"""Semantic delegate search over a NumPy embedding index.
+
+``SemanticIndex`` follows the ``DelegateStore`` like the analytics counters,
+but only marks changed rows as pending: embedding happens on the next search,
+so saves never wait on the model. Each row's vector is cached under a hash of
+its text, on disk at ``EMBEDDINGS_PATH``, so after an edit or a restart only
+new or changed delegates are embedded again.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.delegates import DATE_COLUMN, DelegateStore, StoreChange, row_keys
+from backend.embeddings import Embedder, get_embedder
+
+EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "embeddings.npz")
+SEARCH_TOP_K = 25  # Results shown for a semantic query
+
+
+def record_text(row: Dict) -> str:
+    """The text embedded for a delegate: every non-empty column as "Column: value"."""
+    parts = []
+    for col, value in row.items():
+        if value is None or pd.isna(value) or value == "":
+            continue
+        if col == DATE_COLUMN:
+            value = value.strftime("%d %B %Y")
+        parts.append(f"{col}: {value}")
+    return ". ".join(parts)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class SemanticIndex:
+    """Unit-length embeddings of every delegate, one matrix row per delegate."""
+
+    def __init__(self, embedder: Embedder | None = None, cache_path: str = EMBEDDINGS_PATH):
+        self.embedder = embedder or get_embedder()
+        self.cache_path = cache_path
+        self._lock = threading.Lock()  # Guards _texts and _pending, touched by store callbacks
+        self._refresh_lock = threading.Lock()  # Serializes embedding and searching
+        self._texts: Dict[str, str] = {}  # Row key -> current record text
+        self._versions: Dict[str, int] = {}  # Row key -> store version that last changed it (kept after deletes)
+        self._pending = set()  # Row keys whose text changed since the last refresh
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._slots: Dict[str, int] = {}  # Row key -> matrix row
+        self._slot_keys: List[str | None] = []  # Matrix row -> row key (None if free)
+        self._slot_hashes: List[str | None] = []  # Matrix row -> hash of the text it embeds
+        self._free: List[int] = []
+        self._cache = self._load_cache()  # Text hash -> vector from the previous run, until the first refresh
+
+    # --- Wiring ---
+
+    def attach(self, store: DelegateStore) -> None:
+        store.subscribe(self.apply_change, initial=self.rebuild)
+
+    def rebuild(self, frame: pd.DataFrame) -> None:
+        """Takes every row of a full table as pending."""
+        columns = list(frame.columns)
+        records = zip(*(frame[col].tolist() for col in columns))
+        texts = {key: record_text(dict(zip(columns, values))) for key, values in zip(row_keys(frame), records)}
+        with self._lock:
+            self._pending |= set(self._texts) | set(texts)
+            self._texts = texts
+            self._versions = {}
+
+    def apply_change(self, change: StoreChange) -> None:
+        # The store notifies outside its lock, so two saves' changes can arrive
+        # in either order; a row keeps whichever change is newest
+        with self._lock:
+            for key, row in change.after.items():
+                if change.version < self._versions.get(key, 0):
+                    continue
+                self._versions[key] = change.version
+                if row is None:
+                    self._texts.pop(key, None)
+                else:
+                    self._texts[key] = record_text(row)
+                self._pending.add(key)
+
+    # --- Search ---
+
+    def refresh(self) -> int:
+        """Embeds pending rows (cached vectors are reused). Returns how many were sent to the model."""
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def search(self, query: str, k: int = SEARCH_TOP_K) -> List[Tuple[str, float]]:
+        """Returns up to ``k`` (row key, cosine similarity) pairs, best first."""
+        with self._refresh_lock:
+            self._refresh_locked()
+            live = len(self._slots)
+            if not query.strip() or not live:
+                return []
+            query_vector = self.embedder.embed([query])[0]
+            scores = self._matrix @ query_vector
+            # Free slots hold no delegate; keep them out of the results
+            if self._free:
+                scores[self._free] = -np.inf
+            k = min(k, live)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._slot_keys[i], float(scores[i])) for i in top]
+
+    # --- Internals ---
+
+    def _refresh_locked(self) -> int:
+        with self._lock:
+            pending = {key: self._texts.get(key) for key in self._pending}
+            self._pending.clear()
+        if not pending:
+            return 0
+        changed = False
+        to_embed: Dict[str, List[str]] = {}  # Text hash -> keys with that text
+        texts: Dict[str, str] = {}
+        for key, text in pending.items():
+            if text is None:
+                changed |= self._release(key)
+                continue
+            digest = _text_hash(text)
+            if key in self._slots and self._slot_hashes[self._slots[key]] == digest:
+                continue  # Changed and changed back, or an unrelated column
+            changed = True
+            if digest in self._cache:
+                self._place(key, digest, self._cache[digest])
+            else:
+                to_embed.setdefault(digest, []).append(key)
+                texts[digest] = text
+        if to_embed:
+            digests = list(to_embed)
+            try:
+                vectors = self.embedder.embed([texts[d] for d in digests])
+            except Exception:
+                with self._lock:  # Try these again on the next search
+                    self._pending.update(key for keys in to_embed.values() for key in keys)
+                raise
+            for digest, vector in zip(digests, vectors):
+                for key in to_embed[digest]:
+                    self._place(key, digest, vector)
+            logging.info(f"Embedded {len(digests)} delegate record(s) with {self.embedder.model_id}.")
+        # Everything the old cache could seed was placed by the first refresh
+        self._cache = {}
+        if changed:
+            self._save_cache()
+        return len(to_embed)
+
+    def _place(self, key: str, digest: str, vector: np.ndarray) -> None:
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                self._grow(vector.shape[0])
+            slot = self._free.pop()
+            self._slots[key] = slot
+            self._slot_keys[slot] = key
+        self._matrix[slot] = vector
+        self._slot_hashes[slot] = digest
+
+    def _release(self, key: str) -> bool:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        self._matrix[slot] = 0.0
+        self._slot_keys[slot] = self._slot_hashes[slot] = None
+        self._free.append(slot)
+        return True
+
+    def _grow(self, dimensions: int) -> None:
+        # Double the capacity so appending n delegates copies the matrix O(log n) times
+        old = len(self._slot_keys)
+        new = max(64, old * 2)
+        matrix = np.zeros((new, dimensions), dtype=np.float32)
+        if old:
+            matrix[:old] = self._matrix
+        self._matrix = matrix
+        self._slot_keys += [None] * (new - old)
+        self._slot_hashes += [None] * (new - old)
+        self._free += range(new - 1, old - 1, -1)  # Lowest slot is popped first
+
+    def _load_cache(self) -> Dict[str, np.ndarray]:
+        try:
+            with np.load(self.cache_path) as data:
+                if str(data["model_id"]) != self.embedder.model_id:
+                    logging.info(f"Embedding cache {self.cache_path} is for another model; re-embedding.")
+                    return {}
+                return dict(zip(data["hashes"].tolist(), data["vectors"]))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Could not read embedding cache {self.cache_path}: {e}")
+            return {}
+
+    def _save_cache(self) -> None:
+        # The file holds exactly what the index holds, so vectors of deleted or
+        # edited records don't pile up
+        slots = list(self._slots.values())
+        try:
+            # A unique temp name, so app processes sharing EMBEDDINGS_PATH can't interleave writes
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache_path)), suffix=".npz")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(
+                        f,
+                        model_id=np.array(self.embedder.model_id),
+                        hashes=np.array([self._slot_hashes[slot] for slot in slots], dtype="U40"),
+                        vectors=self._matrix[slots] if slots else np.zeros((0, self._matrix.shape[1]), dtype=np.float32),
+                    )
+                os.replace(tmp_path, self.cache_path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except Exception as e:
+            logging.warning(f"Could not save embedding cache to {self.cache_path}: {e}")
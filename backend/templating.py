@@ -0,0 +1,214 @@
+"""Deterministic slot-filling personalization, no LLM involved.
+
+Renders the invitation from tone-specific variants of ``BASE_TEMPLATE`` by
+dropping the form fields into grammatical sentence slots. Templates are
+compiled once at import, so a render is plain string work.
+"""
+import re
+from string import Template
+from typing import Dict, Any, Iterable, Iterator
+
+# Fields the email form collects; anything else needs a model to phrase it
+TEMPLATE_FIELDS = {
+    "name", "institution", "committee", "position", "experience_level",
+    "special_invite", "deadline", "event_highlight", "tone",
+}
+# Free-text fields we can slot in, but which read better when a model rewrites them
+FREE_TEXT_FIELDS = {"special_invite", "event_highlight"}
+
+DEFAULT_TONE = "Semi-formal"
+
+# Sentence fragments per tone. ${...} placeholders are filled in render_template_message().
+_TONE_PARTS = {
+    "Formal": {
+        "greeting": "Dear ${name},",
+        "intro": "I am writing on behalf of the Organizing Committee of the Global Diplomatic Summit-Lucknow MUN 2025. We are inviting distinguished students${institution_clause} to take part in our upcoming conference, which focuses on global challenges and leadership development.",
+        "body": "The conference will feature multiple specialized committees addressing pressing international issues.",
+        "join": "We would be pleased to welcome you${role_clause}.",
+        "experience": "As ${experience_phrase} delegate, you will find committees and sessions suited to your experience.",
+        "experience_default": "There are opportunities for both beginners and experienced delegates.",
+        "highlight": "Highlights of this year's conference include ${highlight}.",
+        "deadline": "Kindly note that registration closes on ${deadline}.",
+        "invite_suffix": "we would be honoured to have you with us",
+        "question": "Should you wish to learn more about the committees, awards, and registration process, I would be glad to provide further information.",
+        "closing": "I look forward to your response.",
+        "sign_off": "Yours sincerely,",
+    },
+    "Semi-formal": {
+        "greeting": "Hi ${name},",
+        "intro": "I'm part of the Organizing Committee for Global Diplomatic Summit-Lucknow MUN 2025. We're inviting bright minds${institution_clause} to be a part of our upcoming conference that focuses on global challenges and leadership development.",
+        "body": "The conference will feature multiple specialized committees addressing pressing international issues.",
+        "join": "We'd love to have you join us${role_clause}.",
+        "experience": "As ${experience_phrase} delegate, you'll find committees and sessions suited to your experience.",
+        "experience_default": "There are opportunities for both beginners and experienced delegates.",
+        "highlight": "This year's highlights include ${highlight}.",
+        "deadline": "Registration closes on ${deadline}, so do let us know soon.",
+        "invite_suffix": "we'd be delighted to have you with us",
+        "question": "Would you be interested in learning more about the committees, awards, and registration process? I'd be happy to provide additional information.",
+        "closing": "Looking forward to hearing from you!",
+        "sign_off": "Best regards,",
+    },
+    "Conversational": {
+        "greeting": "Hey ${name}!",
+        "intro": "I'm on the Organizing Committee for Global Diplomatic Summit-Lucknow MUN 2025, and we're reaching out to bright minds${institution_clause} to join our upcoming conference on global challenges and leadership.",
+        "body": "We've got a bunch of specialized committees tackling big international issues.",
+        "join": "It'd be great to have you with us${role_clause}!",
+        "experience": "As ${experience_phrase} delegate, you'll find plenty that fits where you're at.",
+        "experience_default": "There's something for everyone, whether you're just starting out or you've done a dozen MUNs.",
+        "highlight": "Oh, and this year we've got ${highlight}!",
+        "deadline": "Heads up: registration closes on ${deadline}.",
+        "invite_suffix": "we'd love to see you there",
+        "question": "Want to hear more about the committees, awards, or how to register? Just reply and I'll fill you in.",
+        "closing": "Hope to hear from you soon!",
+        "sign_off": "Cheers,",
+    },
+}
+
+_SIGNATURE = """[Your Name]
+Organizing Committee
+Global Diplomatic Summit-Lucknow MUN 2025"""
+
+# Compile every fragment once so rendering is only substitution
+_COMPILED = {
+    tone: {key: Template(text) for key, text in parts.items()}
+    for tone, parts in _TONE_PARTS.items()
+}
+
+# Openers of a dangling phrase like "Based on your performance at JNUMUN"
+_LEAD_IN_PHRASE = re.compile(
+    r"^(based on|given|in recognition of|following|after|because of|thanks to|having seen|impressed by)\b",
+    re.IGNORECASE,
+)
+# Institution names that read better with a leading article ("the University of ...")
+_NEEDS_ARTICLE = re.compile(r"^(university|institute|college|school|academy) of\b", re.IGNORECASE)
+
+
+def _indefinite_article(word: str) -> str:
+    """Returns 'a' or 'an' for the given word (good enough for our fixed vocabularies)."""
+    return "an" if word[:1].lower() in "aeiou" else "a"
+
+
+def _sentence(text: str) -> str:
+    """Capitalizes free text and makes sure it ends with punctuation."""
+    text = text.strip()
+    if not text:
+        return ""
+    text = text[0].upper() + text[1:]
+    return text if text[-1] in ".!?" else f"{text}."
+
+
+def _institution_clause(institution: str) -> str:
+    institution = institution.strip()
+    if not institution:
+        return ""
+    if _NEEDS_ARTICLE.match(institution):
+        institution = f"the {institution}"
+    return f" from {institution}"
+
+
+def _committee_phrase(committee: str) -> str:
+    committee = committee.strip()
+    if committee.lower().startswith("the "):
+        return committee
+    return f"the {committee}"
+
+
+def _role_clause(details: Dict[str, Any]) -> str:
+    """Builds ' as a Head Delegate in the UNSC' from whichever parts are present."""
+    clause = ""
+    position = str(details.get("position") or "").strip()
+    committee = str(details.get("committee") or "").strip()
+    if position:
+        clause += f" as {_indefinite_article(position)} {position}"
+    if committee:
+        clause += f" in {_committee_phrase(committee)}"
+    return clause
+
+
+def _event_highlight(highlight: str, template: Template) -> str:
+    """Uses full sentences as-is and wraps noun phrases ("a keynote by ...") in a lead-in."""
+    highlight = highlight.strip()
+    if not highlight or highlight[-1] in ".!?":
+        return _sentence(highlight)
+    first, _, rest = highlight.partition(" ")
+    if first in ("A", "An", "The", "Our"):
+        highlight = f"{first.lower()} {rest}"
+    return template.substitute(highlight=highlight)
+
+
+def _special_invite(note: str, suffix: str) -> str:
+    """Turns a special invite note into a complete sentence."""
+    note = note.strip().rstrip(",")
+    if not note:
+        return ""
+    if note[-1] not in ".!?" and _LEAD_IN_PHRASE.match(note):
+        # "Based on your performance at X" -> "Based on your performance at X, we'd ..."
+        note = f"{note}, {suffix}"
+    return _sentence(note)
+
+
+def _resolve_tone(details: Dict[str, Any]) -> str:
+    tone = details.get("tone") or DEFAULT_TONE
+    return tone if tone in _COMPILED else DEFAULT_TONE
+
+
+def is_simple_request(details: Dict[str, Any]) -> bool:
+    """True when the template engine can handle ``details`` as well as a model would.
+
+    That is the case when every field is one the form collects and no free-text
+    field (special invite, event highlight) needs phrasing.
+    """
+    present = {key for key, value in details.items() if value}
+    return present <= TEMPLATE_FIELDS and not present & FREE_TEXT_FIELDS
+
+
+def render_template_message(details: Dict[str, Any]) -> str:
+    """Renders a personalized message for ``details`` without calling a model.
+
+    Args:
+        details: The same dictionary passed to ``generate_personalized_message``.
+
+    Returns:
+        The rendered message.
+    """
+    parts = _COMPILED[_resolve_tone(details)]
+    name = str(details.get("name") or "").strip()
+    greeting = parts["greeting"].substitute(name=name) if name else "Hi!"
+
+    intro = [parts["intro"].substitute(institution_clause=_institution_clause(str(details.get("institution") or "")))]
+
+    body = [parts["body"].template]
+    experience_level = str(details.get("experience_level") or "").strip()
+    if experience_level:
+        level = experience_level.lower()
+        body.append(parts["experience"].substitute(experience_phrase=f"{_indefinite_article(level)} {level}"))
+    else:
+        body.append(parts["experience_default"].template)
+    if details.get("event_highlight"):
+        body.append(_event_highlight(str(details["event_highlight"]), parts["highlight"]))
+
+    invite = []
+    role_clause = _role_clause(details)
+    if role_clause:
+        invite.append(parts["join"].substitute(role_clause=role_clause))
+    if details.get("special_invite"):
+        invite.append(_special_invite(str(details["special_invite"]), parts["invite_suffix"].template))
+    if details.get("deadline"):
+        invite.append(parts["deadline"].substitute(deadline=str(details["deadline"]).strip()))
+
+    paragraphs = [
+        greeting,
+        " ".join(intro),
+        " ".join(body),
+        " ".join(invite),
+        parts["question"].template,
+        parts["closing"].template,
+        f"{parts['sign_off'].template}\n{_SIGNATURE}",
+    ]
+    return "\n\n".join(p for p in paragraphs if p)
+
+
+def render_campaign(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Renders one message per details dictionary, lazily, for bulk campaigns."""
+    for details in rows:
+        yield render_template_message(details)
@@ -0,0 +1,108 @@
+"""Generation worker pool. Run from the project root:
+
+    python -m backend.worker --processes 4
+
+Start as many of these as needed, on any machine that can reach the jobs
+database (``JOBS_DB_PATH``) and the configured LLM providers.
+"""
+import argparse
+import logging
+import multiprocessing
+import threading
+import time
+
+from backend.backend import generate_personalized_message
+from backend.jobs import (
+    JOBS_DB_PATH, claim_job, finish_job, heartbeat, new_worker_id, open_jobs_db, renew_lease,
+)
+
+POLL_INTERVAL = 0.5  # Seconds between queue checks while idle
+HEARTBEAT_INTERVAL = 10.0  # Also how often the running job's lease is renewed
+
+
+class _KeepAlive:
+    """Heartbeats for a worker, and renews the lease on its current job, from a background thread.
+
+    Runs alongside generation, so a long model call neither makes the worker
+    look gone nor lets its lease expire and the job run twice.
+    """
+
+    def __init__(self, path: str, worker_id: str):
+        self.path = path
+        self.worker_id = worker_id
+        self.job_id: str | None = None  # Set by the worker while it runs a job
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="worker-keepalive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        conn = open_jobs_db(self.path)  # SQLite connections stay on the thread that opened them
+        try:
+            while True:
+                try:
+                    heartbeat(conn, self.worker_id)
+                    job_id = self.job_id
+                    renewed = job_id is None or renew_lease(conn, job_id, self.worker_id)
+                    if not renewed and self.job_id == job_id:  # Not just finished meanwhile
+                        logging.warning(f"Worker {self.worker_id} no longer holds job {job_id}.")
+                except Exception as e:
+                    logging.warning(f"Worker {self.worker_id} heartbeat failed: {e}")
+                if self._stopping.wait(HEARTBEAT_INTERVAL):
+                    return
+        finally:
+            conn.close()
+
+
+def run_worker(path: str = JOBS_DB_PATH) -> None:
+    """Claims and runs jobs until interrupted."""
+    # Child processes don't inherit logging setup under the "spawn" start method
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    worker_id = new_worker_id()
+    conn = open_jobs_db(path)
+    keep_alive = _KeepAlive(path, worker_id)
+    logging.info(f"Generation worker {worker_id} started.")
+    try:
+        while True:
+            job = claim_job(conn, worker_id)
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            keep_alive.job_id = job["id"]
+            try:
+                message = generate_personalized_message(job["details"], engine=job["engine"])
+                error = None if message else "Failed to generate email. Check worker logs or API keys."
+            except Exception as e:
+                message, error = None, str(e)
+            finally:
+                keep_alive.job_id = None
+            finish_job(conn, job["id"], worker_id, message, error)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        keep_alive.stop()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run message generation workers.")
+    parser.add_argument("--processes", type=int, default=2, help="Number of worker processes (default: 2)")
+    parser.add_argument("--db", default=JOBS_DB_PATH, help="Path to the jobs database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    processes = [multiprocessing.Process(target=run_worker, args=(args.db,), daemon=True) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logging.info("Stopping generation workers.")
+
+
+if __name__ == "__main__":
+    main()